@@ -0,0 +1,275 @@
+from ..Classes.classes import Protein, KEY_STRIDE, NEIGHBOUR_STEPS, ENERGY_TABLE, contact_energy
+from . import random as random_algorithm
+from .bound import upper_bound, print_gap
+from .breadthfirst import plot_best_protein
+from math import exp
+import random
+import time
+
+# Direction of the step between the keys of two successive aminoacids (see Protein.move)
+KEY_DIRECTIONS = {-1: 2, 1: -2, -KEY_STRIDE: -1, KEY_STRIDE: 1}
+
+# Steps to the two spots next to a spot, at right angles to a step between two successive aminoacids
+SIDE_STEPS = {1: (KEY_STRIDE, -KEY_STRIDE), -1: (KEY_STRIDE, -KEY_STRIDE), KEY_STRIDE: (1, -1), -KEY_STRIDE: (1, -1)}
+
+
+def geometric_cooling(start_temperature, end_temperature, fraction):
+    """
+    This function returns the temperature after the given fraction of the steps, when the temperature falls by the
+    same factor every step.
+    """
+
+    return start_temperature * (end_temperature / start_temperature) ** fraction
+
+
+def linear_cooling(start_temperature, end_temperature, fraction):
+    """
+    This function returns the temperature after the given fraction of the steps, when the temperature falls by the
+    same amount every step.
+    """
+
+    return start_temperature + (end_temperature - start_temperature) * fraction
+
+
+# Cooling schedules that can be chosen by name
+COOLING_SCHEDULES = {
+    "geometric": geometric_cooling,
+    "linear": linear_cooling,
+}
+
+
+class Fold:
+    """
+    This class holds a folded protein for local search: the key (see Protein.key) of the spot of every aminoacid and a
+    dictionary with the aminoacid on every occupied spot. Unlike Protein, any aminoacid can be moved to another spot,
+    and the score is kept up to date by only looking at the neighbours of the old and new spot.
+    """
+
+    def __init__(self, protein, table=ENERGY_TABLE):
+        self.protein_string = protein.name
+        self.codes = protein.profile.codes
+        self.table = table
+        self.keys = [Protein.key(pos_x, pos_y) for pos_x, pos_y in zip(protein.xs, protein.ys)]
+        self.occupied = {key: index for index, key in enumerate(self.keys)}
+        self.score = Protein.from_route(protein.name, protein.route, table).score
+
+    def contacts(self, index, key):
+        """
+        Returns the stability of the bonds that the aminoacid with the given index makes on the spot with the given
+        key, with the aminoacids around it that are not connected to it.
+        """
+
+        return contact_energy(self.occupied, self.codes, self.table, index, key)
+
+    def relocate(self, index, key, moved):
+        """
+        Moves the aminoacid with the given index to the free spot with the given key, adds its old spot to the list
+        moved (to take the move back) and returns the change in score.
+        """
+
+        old_key = self.keys[index]
+        delta = -self.contacts(index, old_key)
+        del self.occupied[old_key]
+
+        self.keys[index] = key
+        self.occupied[key] = index
+        delta += self.contacts(index, key)
+
+        moved.append((index, old_key))
+        self.score += delta
+
+        return delta
+
+    def restore(self, moved):
+        """
+        Takes back the moves in the list moved, the last one first.
+        """
+
+        for index, old_key in reversed(moved):
+            self.relocate(index, old_key, [])
+
+    def end_move(self, index, rng, moved):
+        """
+        Moves the first or last aminoacid to a random free spot next to its neighbour in the chain.
+        Returns the change in score, or None if there is no free spot.
+        """
+
+        if index == 0:
+            anchor = self.keys[1]
+        else:
+            anchor = self.keys[index - 1]
+
+        spots = [anchor + step for step in NEIGHBOUR_STEPS if anchor + step not in self.occupied]
+        if spots == []:
+            return None
+
+        return self.relocate(index, rng.choice(spots), moved)
+
+    def pull_move(self, index, side, rng, moved):
+        """
+        Makes a pull move (Lesh et al.) of the aminoacid with the given index, around its neighbour in the chain on
+        the given side (1 or -1): the aminoacid moves to a free spot L next to that neighbour and diagonal to its own
+        spot, and its other neighbour in the chain moves to the spot C next to L and its old spot. If the other
+        neighbour is already on C, this is a corner flip. Otherwise the rest of the chain on that side follows, every
+        aminoacid moving to the old spot of the one two places further, until the chain is connected again.
+        Returns the change in score, or None if the move is not possible.
+        """
+
+        keys = self.keys
+        occupied = self.occupied
+        anchor = keys[index + side]
+        bond = keys[index] - anchor
+
+        # Choose the spot L at one of the two sides of the bond, it has to be free
+        spot_l = anchor + rng.choice(SIDE_STEPS[bond])
+        if spot_l in occupied:
+            return None
+        spot_c = spot_l + bond
+
+        # The other neighbour in the chain is already on C: corner flip
+        other = index - side
+        if keys[other] == spot_c:
+            return self.relocate(index, spot_l, moved)
+
+        if spot_c in occupied:
+            return None
+
+        # Move the aminoacid to L and its other neighbour to C
+        old_keys = {index: keys[index], other: keys[other]}
+        delta = self.relocate(index, spot_l, moved)
+        delta += self.relocate(other, spot_c, moved)
+
+        # Pull the rest of the chain until it is connected again
+        j = other - side
+        while 0 <= j < len(keys) and keys[j] - keys[j + side] not in KEY_DIRECTIONS:
+            old_keys[j] = keys[j]
+            delta += self.relocate(j, old_keys[j + 2 * side], moved)
+            j -= side
+
+        return delta
+
+    def random_move(self, rng, moved):
+        """
+        Makes a random end move, corner flip or pull move. Returns the change in score, or None if the chosen move
+        is not possible.
+        """
+
+        index = rng.randrange(len(self.keys))
+        if index == 0 or index == len(self.keys) - 1:
+            if rng.random() < 0.5:
+                return self.end_move(index, rng, moved)
+
+        # A pull move around the neighbour on one side, pulling the chain on the other side
+        if index == 0:
+            side = 1
+        elif index == len(self.keys) - 1:
+            side = -1
+        else:
+            side = rng.choice((1, -1))
+
+        # The ends have no other neighbour, they are simply moved to L
+        if not 0 <= index - side < len(self.keys):
+            anchor = self.keys[index + side]
+            spot_l = anchor + rng.choice(SIDE_STEPS[self.keys[index] - anchor])
+            if spot_l in self.occupied:
+                return None
+            return self.relocate(index, spot_l, moved)
+
+        return self.pull_move(index, side, rng, moved)
+
+    def step(self, temperature, rng):
+        """
+        Makes a random move (see random_move) and keeps it if it does not lower the score, or else with chance
+        exp(change / temperature); otherwise the move is taken back. Returns whether the fold changed.
+        """
+
+        moved = []
+        delta = self.random_move(rng, moved)
+        if delta is None:
+            return False
+        if delta < 0 and rng.random() >= exp(delta / temperature):
+            self.restore(moved)
+            return False
+
+        return True
+
+    def route(self):
+        """
+        Returns the route (list of directions) of the fold.
+        """
+
+        return [KEY_DIRECTIONS[self.keys[i + 1] - self.keys[i]] for i in range(len(self.keys) - 1)]
+
+
+def anneal(protein, steps=100000, start_temperature=2.0, end_temperature=0.1, cooling="geometric", rng=random,
+           table=ENERGY_TABLE):
+    """
+    This function improves a folded protein (e.g. made by random, greedy or lookahead) with simulated annealing: every
+    step a random end move, corner flip or pull move is made (see Fold), and it is kept if it does not lower the
+    score, or else with chance exp(change / temperature). The temperature falls from start_temperature to
+    end_temperature following the cooling schedule, the name of one in COOLING_SCHEDULES or a function of the start
+    temperature, end temperature and the fraction of the steps done. Returns the best protein that was found.
+    """
+
+    if isinstance(cooling, str):
+        cooling = COOLING_SCHEDULES[cooling]
+
+    fold = Fold(protein, table)
+    best_score = fold.score
+    best_route = fold.route()
+
+    # A protein of one or two aminoacids can not be moved
+    if len(fold.keys) < 3:
+        return Protein.from_route(protein.name, best_route, table)
+
+    for step in range(steps):
+        temperature = cooling(start_temperature, end_temperature, step / steps)
+
+        # Make a random move, it is taken back if it is rejected
+        if not fold.step(temperature, rng):
+            continue
+
+        # Remember the best fold
+        if fold.score > best_score:
+            best_score = fold.score
+            best_route = fold.route()
+
+    return Protein.from_route(protein.name, best_route, table)
+
+
+def find_optimum(protein_structure, steps=100000, start_temperature=2.0, end_temperature=0.1, cooling="geometric",
+                 rng=random):
+    """
+    This function folds the protein structure with the random algoritm (with trap detection, see traps.py) and
+    improves the fold with simulated annealing (see anneal). Prints the best route, score and gap, and returns the
+    best protein.
+    """
+
+    start_time = time.time()
+
+    # Make a random fold to start from
+    protein = Protein(protein_structure)
+    random_algorithm.create_random(protein, rng=rng, check_traps=True)
+    while protein.wrong_protein:
+        protein = Protein(protein_structure)
+        random_algorithm.create_random(protein, rng=rng, check_traps=True)
+
+    best_protein = anneal(protein, steps, start_temperature, end_temperature, cooling, rng)
+
+    print("beste protein:", best_protein.route)
+    print("beste score:", best_protein.score)
+    print("time:", time.time() - start_time)
+    print_gap(best_protein.score, upper_bound(protein_structure))
+
+    return best_protein
+
+
+if __name__ == "__main__":
+
+    # Asks user for the protein structure and the number of steps
+    protein_string = input("Please give the protein structure: ")
+    steps = int(input("Please indicate the number of steps: "))
+
+    # Fold the protein, improve it and plot the best one
+    best_protein = find_optimum(protein_string, steps)
+    plot_best_protein(best_protein)
@@ -0,0 +1,90 @@
+from ..Classes.classes import Protein, ENERGY_TABLE
+from .bound import contact_bounds, print_gap, upper_bound
+from .branchbound import remaining_bound, future_aminoacids
+from .breadthfirst import plot_best_protein
+import random
+
+
+def next_directions(protein):
+    """
+    This function returns the directions in which the next aminoacid of the protein can be placed. Routes that are
+    rotations or reflections of each other have the same score, so only one of them is made (see breadthfirst.create_queue):
+    the first move is always to the right, the first turn is always upwards and a route never turns back on itself.
+    """
+
+    if protein.route == []:
+        return [1]
+
+    if protein.route == [1] * len(protein.route):
+        return [1, 2]
+
+    return [direction for direction in (2, 1, -2, -1) if direction != -protein.route[-1]]
+
+
+def beam_search(protein_string, beam_width=100, use_bound=False, min_score=0, rng=random, table=ENERGY_TABLE):
+    """
+    This function folds the protein with beam search: for every aminoacid, all proteins in the beam are extended with
+    every free direction, and only the beam_width proteins with the highest score are kept. With use_bound=True an upper
+    bound of what the rest of the protein can still add is calculated (see branchbound.remaining_bound): proteins whose
+    score plus bound is lower than min_score (e.g. the score of an earlier run) are removed, and of proteins with the
+    same score the ones with the highest bound are kept first. Other proteins with the same rank are chosen randomly with rng.
+    A larger beam gives better proteins, the time grows linearly with the length of the protein and the beam.
+    Returns the best protein, or 0 if all proteins got stuck (or could not reach min_score).
+    """
+
+    best_energy, suffix = contact_bounds(protein_string, table)
+
+    # The bonds among the aminoacids that are not placed yet use room of both parities
+    optimum = [min(suffix[0][i], suffix[1][i]) for i in range(len(protein_string) + 1)]
+    futures = future_aminoacids(protein_string, 0, best_energy)
+
+    beam = [Protein(protein_string, table)]
+
+    for placed in range(1, len(protein_string)):
+
+        # Score every extension of every protein in the beam, by trying the move and taking it back
+        extensions = []
+        for number, protein in enumerate(beam):
+            for direction in next_directions(protein):
+                protein.move(direction)
+                if not protein.wrong_protein:
+                    if use_bound:
+                        bound = remaining_bound(protein, 0, best_energy, suffix, optimum, futures)
+                        if protein.score + bound >= min_score:
+                            extensions.append(((protein.score, bound), number, direction))
+                    else:
+                        extensions.append(((protein.score, 0), number, direction))
+                protein.undo()
+
+        # Stop if all proteins got stuck or can not reach min_score
+        if extensions == []:
+            return 0
+
+        # Keep the best extensions, in random order when they have the same rank
+        rng.shuffle(extensions)
+        extensions.sort(key=lambda extension: extension[0], reverse=True)
+
+        # Make the new beam from the kept extensions
+        new_beam = []
+        for rank, number, direction in extensions[:beam_width]:
+            protein = beam[number].copy()
+            protein.move(direction)
+            new_beam.append(protein)
+        beam = new_beam
+
+    return max(beam, key=lambda protein: protein.score)
+
+
+if __name__ == "__main__":
+
+    # Asks user for the protein structure and the width of the beam
+    protein_string = input("Please give the protein structure: ")
+    beam_width = int(input("Please indicate the width of the beam: "))
+
+    # Fold the protein and print its route, score and gap
+    best_protein = beam_search(protein_string, beam_width)
+    if best_protein != 0:
+        print("best protein", best_protein.route)
+        print("best score", best_protein.score)
+        print_gap(best_protein.score, upper_bound(protein_string))
+        plot_best_protein(best_protein)
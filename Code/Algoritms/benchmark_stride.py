@@ -0,0 +1,67 @@
+from .lookahead_collectdata import fold_protein
+import random
+import time
+import csv
+
+# Protein structures from the assignment (see README.md)
+SEQUENCES = [
+    "HHPHHHPHPHHHPH",
+    "HPHPPHHPHPPHPHHPPHPH",
+    "PPPHHPPHHPPPPPHHHHHHHPPHHPPPPHHPPHPP",
+    "HHPHPHPHPHHHHPHPPPHPPPHPPPPHPPPHPPPHPHHHHPHPHPHPHH",
+    "PPCHHPPCHPPPPCHHHHCHHPPHHPPPPHHPPHPP",
+    "CPPCHPPCHPPCPPHHHHHHCCPCHPPCPCHPPHPC",
+    "HCPHPCPHPCHCHPHPPPHPPPHPPPPHPCPHPPPHPHHHCCHCHCHCHH",
+    "HCPHPHPHCHHHHPCCPPHPPPHPPPPCPPPHPPPHPHHHHCHPHPHPHH",
+]
+
+
+def benchmark_stride(sequences=SEQUENCES, lookahead=6, strides=(1, 2, 3, 4, 5), trials=20, seed=0):
+    """
+    This function folds every protein structure trials times with the look-ahead algoritm for every stride, without
+    cache, with the same seeds for every stride. It prints and returns, per protein structure and stride, the mean
+    and highest score of the folds, the number of folds that got stuck and the mean time per fold, so the loss of
+    stability can be compared with the speedup.
+    """
+
+    results = []
+
+    for protein_string in sequences:
+        for stride in strides:
+
+            scores = []
+            stuck = 0
+            start_time = time.time()
+
+            for trial in range(trials):
+                protein = fold_protein(protein_string, lookahead, random.Random(seed + trial), stride=stride)
+                if protein == 0:
+                    stuck += 1
+                else:
+                    scores.append(protein.score)
+
+            fold_time = (time.time() - start_time) / trials
+            if scores:
+                mean_score = sum(scores) / len(scores)
+                best_score = max(scores)
+            else:
+                mean_score = 0
+                best_score = 0
+
+            results.append([protein_string, stride, mean_score, best_score, stuck, fold_time])
+            print(protein_string, "stride:", stride, "mean score:", round(mean_score, 2), "best score:", best_score,
+                  "stuck:", stuck, "time per fold:", round(fold_time, 4))
+
+    return results
+
+
+if __name__ == "__main__":
+
+    # Run the benchmark and write the results in the result file
+    results = benchmark_stride()
+
+    f = open("resultfile_stride", "w")
+    with f:
+        writer = csv.writer(f)
+        writer.writerow(["Protein", "Stride", "Mean stability", "Best stability", "Stuck", "Time"])
+        writer.writerows(results)
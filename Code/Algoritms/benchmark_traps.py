@@ -0,0 +1,64 @@
+from ..Classes.classes import Protein
+from .benchmark_stride import SEQUENCES
+from .parallel import CREATE_FUNCTIONS
+import random
+import time
+import csv
+
+
+def attrition_rate(create_random, protein_string, trials, rng=random, check_traps=False):
+    """
+    This function folds the protein structure trials times with the given create_random function and returns the
+    attrition rate (the part of the trials that got stuck) and the time per valid protein.
+    """
+
+    stuck = 0
+    start_time = time.time()
+
+    for trial in range(trials):
+        protein = Protein(protein_string)
+        create_random(protein, rng=rng, check_traps=check_traps)
+        if protein.wrong_protein:
+            stuck += 1
+
+    valid = trials - stuck
+    if valid > 0:
+        valid_time = (time.time() - start_time) / valid
+    else:
+        valid_time = None
+
+    return stuck / trials, valid_time
+
+
+def benchmark_traps(sequences=SEQUENCES, trials=2000, seed=0):
+    """
+    This function measures the attrition rate and time per valid protein of the random and greedy algoritm, for every
+    protein structure, without and with trap detection (see traps.py), with the same seed for both.
+    Prints and returns a list with the results per protein structure, algorithm and setting.
+    """
+
+    results = []
+
+    for protein_string in sequences:
+        for algorithm, create_random in CREATE_FUNCTIONS.items():
+            for check_traps in (False, True):
+                rate, valid_time = attrition_rate(create_random, protein_string, trials, random.Random(seed),
+                                                  check_traps)
+
+                results.append([protein_string, algorithm, check_traps, rate, valid_time])
+                print(protein_string, algorithm, "trap detection:", check_traps, "attrition:", round(rate, 3),
+                      "time per valid protein:", valid_time)
+
+    return results
+
+
+if __name__ == "__main__":
+
+    # Run the benchmark and write the results in the result file
+    results = benchmark_traps()
+
+    f = open("resultfile_traps", "w")
+    with f:
+        writer = csv.writer(f)
+        writer.writerow(["Protein", "Algoritme", "Trap detection", "Attrition", "Time per valid protein"])
+        writer.writerows(results)
@@ -0,0 +1,131 @@
+from ..Classes.classes import Protein, AMINO_CODES, ENERGY_TABLE
+
+
+def contact_bounds(protein_string, table=ENERGY_TABLE):
+    """
+    This function calculates, for every aminoacid, the highest stability its future bonds can add to the score.
+    On the square grid, two aminoacids can only make a bond if one of them has an even and the other an odd index.
+    An aminoacid can make at most two bonds (three for the first and last aminoacid, see max_bonds), each worth at most 
+    its most stable bond with an aminoacid of the other parity. Returns the stability per aminoacid and, per parity,
+    the suffix sums of these stabilities (so suffix[parity][i] is the total from aminoacid i onwards).
+    """
+
+    protein = Protein(protein_string, table)
+    codes = protein.profile.codes
+    length = len(codes)
+
+    # Find the most stable bond every aminoacid can make with an aminoacid of the other parity
+    best_energy = [0] * length
+    for i in protein.profile.active:
+        for j in protein.profile.active:
+            if (i - j) % 2 == 1 and abs(i - j) > 1:
+                best_energy[i] = max(best_energy[i], table[codes[i] * 4 + codes[j]])
+
+    # Multiply by the maximum number of bonds of the aminoacid
+    capacity = max_bonds(protein_string)
+    bounds = [capacity[i] * best_energy[i] for i in range(length)]
+
+    # Sum the bounds from every aminoacid onwards, separately for even and odd aminoacids
+    suffix = [[0] * (length + 1), [0] * (length + 1)]
+    for i in range(length - 1, -1, -1):
+        suffix[0][i] = suffix[0][i + 1]
+        suffix[1][i] = suffix[1][i + 1]
+        suffix[i % 2][i] += bounds[i]
+
+    return best_energy, suffix
+
+
+def max_bonds(protein_string):
+    """
+    This function calculates how many bonds every aminoacid can make at most: two, three for the first and last
+    aminoacid (they have only one connected neighbour), and never more than the number of H- and C-aminoacids of the
+    other parity that are not connected to it. Polar aminoacids make no bonds. Returns a list with a number per aminoacid.
+    """
+
+    length = len(protein_string)
+    active = [i for i, amino in enumerate(protein_string) if amino in "HC"]
+
+    capacity = [0] * length
+    for i in active:
+
+        # Count the aminoacids this aminoacid can make a bond with
+        partners = 0
+        for j in active:
+            if (i - j) % 2 == 1 and abs(i - j) > 1:
+                partners += 1
+
+        if i == 0 or i == length - 1:
+            capacity[i] = min(3, partners)
+        else:
+            capacity[i] = min(2, partners)
+
+    return capacity
+
+
+def bond_capacities(protein_string):
+    """
+    This function counts how many bonds the H- and C-aminoacids with an even index, and those with an odd index, can make
+    at most (see max_bonds). Returns a dictionary with (parity, aminoacid) as key, e.g. capacities[0, "H"] for the even
+    H-aminoacids.
+    """
+
+    capacity = max_bonds(protein_string)
+    capacities = {(0, "H"): 0, (0, "C"): 0, (1, "H"): 0, (1, "C"): 0}
+
+    for i, amino in enumerate(protein_string):
+        if amino in "HC":
+            capacities[i % 2, amino] += capacity[i]
+
+    return capacities
+
+
+def upper_bound(protein_string, table=ENERGY_TABLE):
+    """
+    This function calculates an upper bound of the score of any protein with the given structure. Every bond is made
+    between an even and an odd aminoacid, so the bonds are divided over the room of both parities (see bond_capacities):
+    the HH-, HC-, CH- and CC-bonds between even and odd aminoacids. The number of HH- and CC-bonds is tried exhaustively,
+    with as many HC- and CH-bonds as the remaining room allows, and the highest total stability is returned.
+    No protein scores higher, most optimal proteins score lower (not every free spot can be used).
+    """
+
+    capacities = bond_capacities(protein_string)
+    h = AMINO_CODES["H"]
+    c = AMINO_CODES["C"]
+
+    # Stability of the bonds between the types of aminoacids
+    hh = table[h * 4 + h]
+    hc = table[h * 4 + c]
+    ch = table[c * 4 + h]
+    cc = table[c * 4 + c]
+
+    # Room of the even and odd H- and C-aminoacids
+    even_h = capacities[0, "H"]
+    even_c = capacities[0, "C"]
+    odd_h = capacities[1, "H"]
+    odd_c = capacities[1, "C"]
+
+    best = 0
+    for cc_bonds in range(min(even_c, odd_c) + 1):
+        for hh_bonds in range(min(even_h, odd_h) + 1):
+
+            # Fill the remaining room with bonds between an even H and an odd C, and an even C and an odd H
+            hc_bonds = min(even_h - hh_bonds, odd_c - cc_bonds)
+            ch_bonds = min(even_c - cc_bonds, odd_h - hh_bonds)
+
+            total = cc_bonds * cc + hh_bonds * hh + hc_bonds * hc + ch_bonds * ch
+            best = max(best, total)
+
+    # The bound from the most stable bond of every single aminoacid can be lower
+    best_energy, suffix = contact_bounds(protein_string, table)
+
+    return min(best, suffix[0][0], suffix[1][0])
+
+
+def print_gap(score, bound):
+    """
+    This function prints the upper bound and the gap between the given score and the upper bound.
+    A gap of zero means that the score is optimal.
+    """
+
+    print("upper bound:", bound)
+    print("gap:", bound - score)
@@ -0,0 +1,310 @@
+from ..Classes.classes import Protein, KEY_STRIDE, ENERGY_TABLE
+from .bound import contact_bounds, max_bonds
+import time
+
+# Change of the x- and y-coordinate to the four neighbouring spots
+SPOT_STEPS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+# Direction of a move (see Protein.move) per change of the x- and y-coordinate
+STEP_DIRECTIONS = {(1, 0): 1, (-1, 0): -1, (0, -1): 2, (0, 1): -2}
+
+
+def future_aminoacids(protein_string, offset, best_energy):
+    """
+    This function lists, for every number of placed aminoacids of the part of the protein structure from index offset
+    onwards, the H- and C-aminoacids that are not placed yet: how many steps along the route they are from the last
+    placed aminoacid, the row of their code in the energy table and the most stability their bonds can add (see
+    bound.max_bonds). An aminoacid k steps further can only reach spots at a distance of at most k from the last placed
+    aminoacid, with the same parity as k, so per parity the largest number of steps is kept as well.
+    Returns a list with ([even limit, odd limit], list of (steps, row, most, parity)) per number of placed aminoacids,
+    a limit is -1 if there is no such aminoacid.
+    """
+
+    part = protein_string[offset:]
+    capacity = max_bonds(protein_string)
+    codes = Protein(part).profile.codes
+
+    futures = []
+    for placed in range(len(part) + 1):
+        limit = [-1, -1]
+        aminoacids = []
+        for index in range(placed, len(part)):
+            if part[index] in "HC":
+                steps = index - placed + 1
+                limit[steps % 2] = steps
+                aminoacids.append((steps, codes[index] * 4, capacity[offset + index] * best_energy[offset + index],
+                                   (offset + index) % 2))
+        futures.append((limit, aminoacids))
+
+    return futures
+
+
+def remaining_bound(protein, offset, best_energy, suffix, optimum, futures):
+    """
+    This function calculates an upper bound of the stability that the not yet placed aminoacids can still add to the
+    score of a partly folded protein. The protein holds the aminoacids from index offset onwards of the protein structure
+    that best_energy, suffix and optimum belong to, futures are the future aminoacids of that part (see
+    future_aminoacids). The bonds among the aminoacids that are not placed yet add at most the optimum score of that
+    part of the protein on its own. The other future bonds are made on the free spots next to placed H- and
+    C-aminoacids that an aminoacid that is not placed yet can still reach (spots enclosed on all sides can not be
+    reached). An aminoacid that is not placed yet ends up on one spot, so its bonds with placed aminoacids add at most
+    the stability of the best spot it can reach, and per parity these bonds need free spots of placed aminoacids of
+    the other parity. Every future bond has one even and one odd aminoacid, so the bonds among the aminoacids that are
+    not placed yet and their bonds with placed aminoacids share the room of both parities. The bound is the highest
+    total of bonds that fits in this room.
+    """
+
+    placed = len(protein.xs)
+    occupied = protein.occupied
+    codes = protein.profile.codes
+    table = protein.table
+    xs = protein.xs
+    ys = protein.ys
+    head_x = xs[-1]
+    head_y = ys[-1]
+    limit, aminoacids = futures[placed]
+
+    # Bonds that the aminoacids that are not placed yet can make, per parity
+    unplaced = [suffix[0][offset + placed], suffix[1][offset + placed]]
+
+    # Bonds of the placed aminoacids with aminoacids that are not placed yet, one per reachable free neighbouring spot
+    free_spots = [0, 0]
+
+    # Reachable free spots, with their distance to the last placed aminoacid and the stability that an aminoacid on
+    # them adds, per row of the energy table (with and without the last placed aminoacid, the next one can not bond it)
+    spots = {}
+
+    for i in protein.profile.active:
+        if i >= placed:
+            break
+        energy = best_energy[offset + i]
+        if energy == 0:
+            continue
+
+        # The spots next to the aminoacid are one step further from the last placed aminoacid, or one step closer
+        distance = abs(xs[i] - head_x) + abs(ys[i] - head_y)
+        if limit[(distance + 1) % 2] < distance - 1:
+            continue
+
+        free = 0
+        for step_x, step_y in SPOT_STEPS:
+            spot_x = xs[i] + step_x
+            spot_y = ys[i] + step_y
+            spot = spot_x * KEY_STRIDE + spot_y
+            if spot not in occupied:
+                spot_distance = abs(spot_x - head_x) + abs(spot_y - head_y)
+                if spot_distance > limit[spot_distance % 2]:
+                    continue
+
+                # A free spot enclosed by aminoacids on all sides can only be reached from the last placed one
+                if spot_distance > 1 and spot + 1 in occupied and spot - 1 in occupied and \
+                        spot + KEY_STRIDE in occupied and spot - KEY_STRIDE in occupied:
+                    continue
+
+                free += 1
+
+                entry = spots.get(spot)
+                if entry is None:
+                    entry = spots[spot] = [spot_distance, 0, 0, 0, 0]
+                h_energy = table[8 + codes[i]]
+                c_energy = table[12 + codes[i]]
+                entry[1] += h_energy
+                entry[2] += c_energy
+                if i != placed - 1:
+                    entry[3] += h_energy
+                    entry[4] += c_energy
+
+        # The last placed aminoacid needs one of its free spots for the next aminoacid in the route
+        if i == placed - 1 and free > 0:
+            free -= 1
+        free_spots[(offset + i) % 2] += free * energy
+
+    # Every aminoacid that is not placed yet bonds with placed aminoacids from the best spot it can reach, per parity
+    # these bonds can not add more than the free spots of the placed aminoacids of the other parity
+    cross = [0, 0]
+    entries = list(spots.values())
+    for steps, row, most, parity in aminoacids:
+        column = 1 + (row == 12)
+        if steps == 1:
+            column += 2
+        best = 0
+        for entry in entries:
+            if entry[0] <= steps and (steps - entry[0]) % 2 == 0 and entry[column] > best:
+                best = entry[column]
+        cross[parity] += min(best, most)
+    cross[0] = min(cross[0], free_spots[1])
+    cross[1] = min(cross[1], free_spots[0])
+
+    # The bonds among the aminoacids that are not placed yet (internal) use room of both sides, whatever room is left 
+    # can be used for bonds with placed aminoacids
+    highest_internal = min(optimum[offset + placed], unplaced[0], unplaced[1])
+    highest = 0
+    for internal in (0, highest_internal, unplaced[0] - cross[0], unplaced[1] - cross[1]):
+        internal = min(max(internal, 0), highest_internal)
+        highest = max(highest, internal + min(cross[0], unplaced[0] - internal) + min(cross[1], unplaced[1] - internal))
+
+    return highest
+
+
+def search(protein_string, offset, best_score, best_energy, suffix, optimum, table):
+    """
+    This function folds the part of the protein structure from index offset onwards depth-first, looking for a protein
+    with a higher score than best_score. Only one route of every group of rotations and reflections is folded 
+    (see breadthfirst.create_queue) and the next moves are tried in order of the stability they add. A partly folded 
+    protein is abandoned as soon as its score plus the upper bound of what the remaining aminoacids can add is not 
+    higher than the best score so far. The search stops when the upper bound of the whole protein is reached.
+    Returns the best protein and the number of folded aminoacids, the best protein is None if nothing better is found.
+    """
+
+    protein = Protein(protein_string[offset:], table)
+    futures = future_aminoacids(protein_string, offset, best_energy)
+    depth = protein.length - 1
+    best_route = None
+    nodes = 0
+
+    # Highest score that any protein can have, there is nothing to search if the best score already reaches it
+    highest_possible = remaining_bound(protein, offset, best_energy, suffix, optimum, futures)
+    if best_score >= highest_possible:
+        return None, nodes
+
+    # For every placed aminoacid, keep the directions that still have to be tried for the next one
+    options = [[1]]
+
+    while options:
+
+        # If all directions have been tried, take back the last move
+        if options[-1] == []:
+            options.pop()
+            if protein.route:
+                protein.undo()
+            continue
+
+        protein.move(options[-1].pop())
+        nodes += 1
+
+        # Save the protein if it is complete and better than the best one so far
+        if len(protein.route) == depth:
+            if protein.score > best_score:
+                best_score = protein.score
+                best_route = list(protein.route)
+
+                # No protein can do better than the upper bound
+                if best_score >= highest_possible:
+                    break
+
+            protein.undo()
+            continue
+
+        # Abandon the protein if it can not become better than the best one so far
+        if protein.score + remaining_bound(protein, offset, best_energy, suffix, optimum, futures) <= best_score:
+            protein.undo()
+            continue
+
+        # List the free directions for the next aminoacid, the first turn is always upwards
+        if protein.route == [1] * len(protein.route):
+            directions = [1, 2]
+        else:
+            directions = [-2, -1, 2, 1]
+
+        # Try the directions that add the most stability first (the last one in the list is tried first)
+        gains = []
+        for direction in directions:
+            if direction != -protein.route[-1]:
+                gain = protein.move(direction)
+                if not protein.wrong_protein:
+                    gains.append((gain, direction))
+                protein.undo()
+        gains.sort()
+        options.append([direction for gain, direction in gains])
+
+    if best_route is None:
+        return None, nodes
+
+    return Protein.from_route(protein_string[offset:], best_route, table), nodes
+
+
+def extend_front(protein_string, offset, protein, table):
+    """
+    This function puts aminoacid offset of the protein structure in front of a folded protein of the part from index
+    offset + 1 onwards, on a free spot next to its first aminoacid. Returns the best of these proteins, or None if the
+    first aminoacid has no free neighbouring spot.
+    """
+
+    best_protein = None
+    for step_x, step_y in SPOT_STEPS:
+        xs = [protein.xs[0] + step_x] + list(protein.xs)
+        ys = [protein.ys[0] + step_y] + list(protein.ys)
+        if Protein.key(xs[0], ys[0]) in protein.occupied:
+            continue
+
+        route = [STEP_DIRECTIONS[xs[i + 1] - xs[i], ys[i + 1] - ys[i]] for i in range(len(xs) - 1)]
+        new_protein = Protein.from_route(protein_string[offset:], route, table)
+        if best_protein is None or new_protein.score > best_protein.score:
+            best_protein = new_protein
+
+    return best_protein
+
+
+def find_optimum(protein_string, table=ENERGY_TABLE):
+    """
+    This function finds a protein with the highest possible score, and proves that no protein scores higher, with branch
+    and bound. The optimum of every final part of the protein structure is found first, from short to long, so the
+    search of every longer part can use the optimum of the parts that are not placed yet in its upper bound.
+    The best protein of the part without its first aminoacid, with that aminoacid put in front of it (see extend_front),
+    is the protein to beat, so the search only has to prove that nothing scores higher; if the first aminoacid does
+    not fit, the score of that part is used as the score to beat (if it is not reached after all, the part is searched
+    again without it). Returns the best protein.
+    """
+
+    length = len(protein_string)
+    best_energy, suffix = contact_bounds(protein_string, table)
+
+    # Optimum score of the protein structure from every index onwards
+    optimum = [0] * (length + 1)
+
+    best_protein = Protein(protein_string, table)
+    nodes = 0
+    start_time = time.time()
+
+    for offset in range(length - 2, -1, -1):
+
+        # Start from the best protein of the part that is one aminoacid shorter, with the aminoacid put in front of it
+        start_protein = None
+        if offset < length - 2:
+            start_protein = extend_front(protein_string, offset, best_protein, table)
+
+        # Look for a better protein, or one that scores at least as high as the shorter part
+        if start_protein is not None:
+            best_score = start_protein.score
+        else:
+            best_score = optimum[offset + 1] - 1
+        found_protein, part_nodes = search(protein_string, offset, best_score, best_energy, suffix, optimum, table)
+        nodes += part_nodes
+
+        if found_protein is not None:
+            best_protein = found_protein
+        elif start_protein is not None:
+            best_protein = start_protein
+
+        # If there is none, look for the best protein of any score
+        else:
+            best_protein, part_nodes = search(protein_string, offset, -1, best_energy, suffix, optimum, table)
+            nodes += part_nodes
+
+        optimum[offset] = best_protein.score
+
+    print("nodes:", nodes)
+    print("time:", time.time() - start_time)
+
+    return best_protein
+
+
+if __name__ == "__main__":
+
+    # Asks user for the protein structure
+    protein_string = input("Please give the protein structure: ")
+
+    # Find the best protein and print its route and score
+    best_protein = find_optimum(protein_string)
+    print("best protein", best_protein.route)
+    print("best score", best_protein.score)
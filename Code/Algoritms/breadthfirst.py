@@ -1,195 +1,159 @@
 from queue import Queue
-import copy
-from ..Classes.classes import Protein
+from itertools import islice
+from ..Classes.classes import Protein, KEY_STRIDE
+from .scoring import route_array, score_routes
 from math import floor
 import matplotlib.pyplot as plt
 import numpy as np
 
 
-def check_neighbours_h(protein, pos_x, pos_y):
-    """
-    Given a specific position in a given protein, this function checks whether one or more of the neighbouring aminoacids are hydrophobic. 
-    It returns a list that includes the corresponding directions to arrive at the hydrophobic neighbours. 
-    """
-
-    # Initialize an empty list 
-    neighbours = []
+# Letter of the opposite direction of every direction, a route can never go back in the direction it came from
+REVERSE = {"A": "C", "B": "D", "C": "A", "D": "B"}
 
-    # If upper neighbour is hydrophobic, add corresponding direction to the neighbours list 
-    if protein.grid[pos_y - 1][pos_x] == "H":
-        neighbours.append(2)
-    
-    # If lower neighbour is hydrophobic, add corresponding direction to the neighbours list             
-    if protein.grid[pos_y + 1][pos_x] == "H":
-        neighbours.append(-2)
-    
-    # If left neighbour is hydrophobic, add corresponding direction to the neighbours list       
-    if protein.grid[pos_y][pos_x - 1] == "H":
-        neighbours.append(-1)
-    
-    # If right neighbour is hydrophobic, add corresponding direction to the neighbours list       
-    if protein.grid[pos_y][pos_x + 1] == "H":
-        neighbours.append(1)
+# Number of routes that make_proteins scores at once
+CHUNK_SIZE = 1 << 16
 
-    return neighbours
-    
 
-def calculate_score(protein):
-    """
-    This function calculates the score of a protein route given a protein structure. It loops over the protein length to first find HH-bonds.
-    The corresponding points are added to the score. The addition to the score is halved, in order to prevent duplicate bonds.
-    The function does not look for CC- or CH-bonds, since the corresponding protein structures are too long to run. 
-    """
-
-    # Define x and y coordinates as starting positions (0,0; defined in Protein class)
-    pos_x = protein.start_x
-    pos_y = protein.start_y
-
-    # Loop over the protein length
-    for x in range(protein.length):
-
-        # Check whether the aminoacid is hydrophobic 
-        if protein.name_list[x] == "H":
-
-            # If the aminoacid is hydrophobic, check the neighbouring hydrophobic aminoacids
-            neighbours = check_neighbours_h(protein = protein, pos_x = pos_x, pos_y = pos_y)
-
-            # Loop over the list of (directions to) hydrophobic neighbours 
-            for i in neighbours:
-                
-                # If the first aminoacid is not connected to the hydrophobic neighbour, add 0.5 to the score 
-                if x == 0:
-                    if protein.route[x] != i:
-                        protein.score += 1
-
-                # If the final aminoacid is not connected to the hydrophobic neighbour, add 0.5 to the score
-                elif x >= len(protein.route) - 1:
-                    if protein.route[x-1] != - i:
-                        protein.score += 1    
-      
-                # If any aminoacid (but the first and final) is not connected to the hydrophobic neighbour, add 0.5 to the score 
-                elif protein.route[x] != i and protein.route[x-1] != -i:
-                    protein.score += 1
-                    protein.bonds.append(x)
-        
-        # As long as x is within the range of the route length, 
-        if x < len(protein.route):
-
-            # If the move is horizontal, update the x-coordinate 
-            if abs(protein.route[x]) <= 1:
-                pos_x += protein.route[x]
-            # If the move is vertical, update the y-coordinate
-            else:
-                pos_y -= int(protein.route[x]/2)
-
-
-def create_queue(protein_string):
+def create_queue(protein_string, canonical=True):
     """
     This function creates a queue that lists all possible unique combinations of directions, i. e. routes. 
     Subsequently, it returns a list that only includes routes of the valid length.
+    If canonical is True, only one route of every group of routes that are rotations or reflections of each other
+    is listed: the first move is always to the right (B), the first move that is not to the right is always 
+    upwards (A), and a move never goes back in the direction of the previous move. In effect, every route is a 
+    series of left, straight and right turns. The canonical routes have the same scores as all routes, 
+    but there are roughly 8 x (4/3)^n fewer of them.
     """
 
-def create_queue(protein_string):
     depth = len(protein_string) - 1 
-    # global queue
     queue = Queue()
     queue2 = []
     queue.put("")
 
     while not queue.empty():
         state = queue.get()
-        
-        
+
         if len(state) < depth:
-            for i in ['A', 'B', 'C', 'D']:
-                child = copy.deepcopy(state)
-                child += i
+
+            # Choose the possible directions of the next move
+            if not canonical:
+                directions = ["A", "B", "C", "D"]
+            elif state == "":
+                directions = ["B"]
+            elif state == "B" * len(state):
+                directions = ["A", "B"]
+            else:
+                directions = [i for i in ["A", "B", "C", "D"] if i != REVERSE[state[-1]]]
+
+            for i in directions:
+                child = state + i
                 queue.put(child)
                 if len(state) == depth - 1:
                     queue2.append(child)
-    
-    
-    
 
     return queue2
 
 
+def generate_routes(protein_string, canonical=True):
+    """
+    This function generates all routes that never pass the same spot twice, one by one, by folding the protein 
+    depth-first. A route is abandoned as soon as it runs into itself, so only valid routes are generated and only
+    the route that is being folded is kept in memory. The routes are tuples of directions (2, -2, -1, 1). 
+    If canonical is True, only one route of every group of rotations and reflections is generated (see create_queue).
+    """
+
+    depth = len(protein_string) - 1
+    if depth < 1:
+        return
+
+    # Initialize the route, the position of the last aminoacid and the occupied spots
+    route = []
+    positions = [(0, 0)]
+    occupied = {0}
+
+    # For every placed aminoacid, keep the directions that still have to be tried for the next one
+    options = [[1] if canonical else [-2, -1, 2, 1]]
+
+    while options:
+
+        # If all directions have been tried, take back the last move
+        if options[-1] == []:
+            options.pop()
+            if route:
+                route.pop()
+                pos_x, pos_y = positions.pop()
+                occupied.remove(pos_x * KEY_STRIDE + pos_y)
+            continue
+
+        # Find the spot in the next direction and skip it if it is already taken
+        direction = options[-1].pop()
+        pos_x, pos_y = positions[-1]
+        if abs(direction) <= 1:
+            pos_x += direction
+        else:
+            pos_y -= direction // 2
+        key = pos_x * KEY_STRIDE + pos_y
+        if key in occupied:
+            continue
+
+        route.append(direction)
+
+        # Yield the route if it is complete
+        if len(route) == depth:
+            yield tuple(route)
+            route.pop()
+            continue
+
+        # Otherwise place the aminoacid and list the directions for the next one, never going back 
+        positions.append((pos_x, pos_y))
+        occupied.add(key)
+        if canonical and route == [1] * len(route):
+            options.append([1, 2])
+        else:
+            options.append([i for i in [-2, -1, 2, 1] if i != -direction])
+
+
 def make_proteins(queue2, protein_string):
     """
-    This function analyzes each individual route from the passed on list of routes (queue2). For each route,
-    directions are transformed into positions in a coordinate list, starting in the middle of the grid (0,0). 
-    Only "possible" positions can be added to the coordinate list, i.e. positions that are not yet in there. 
-    Subsequently, the function calculates the score for only those routes that are "possible", 
-    and from these returns the best protein with its attributes. 
+    This function scores the routes from the passed on routes (queue2) with score_routes. The routes can be a list
+    (e.g. from create_queue) or a stream (e.g. from generate_routes), they are scored in chunks of CHUNK_SIZE routes. 
+    A route is only "possible" if it does not pass a position that is already taken. 
+    From the "possible" routes, the function returns the best protein with its attributes. 
     """
 
-    # Set the highest score to zero and the best protein and grid to none
+    # Set the highest score to zero and the best route to none
     highest_score = 0
-    best_protein = None
-    best_grid = None
-
-    # Loop through the list of possible routes
-    for i in queue2:
-
-        # Initalize empty list for coordinates of the aminoacid
-        coordinates = []    
-
-        # Define protein object
-        protein = Protein(protein_string)
-        
-        # Define x and y coordinates as starting positions (0,0; defined in Protein class) and append to coordinate list
-        pos_x = protein.start_x
-        pos_y = protein.start_y
-        coordinates.append((pos_x, pos_y))
-
-        # Make a list of the concerned possible route (i'th element in queue2) 
-        route_list = list(i)
-
-        # Loop through the number directions of the route
-        for j in range(protein.length - 1):
-
-            # Define direction concerned
-            move = route_list[j]
-
-            # If the move is upwards, adapt y-coordinate and append corresponding direction to protein route
-            if move == "A":
-                pos_y -= 1
-                protein.route.append(2)
-
-            # If the move is downward, adapt y-coordinate and append corresponding direction to protein route
-            if move == "C":
-                pos_y += 1
-                protein.route.append(-2)
-
-            # If the move is to the right, adapt x-coordinate and append corresponding direction to protein route
-            if move == "D":
-                pos_x -= 1
-                protein.route.append(-1)
-
-            # If the move is to the left, adapt x-coordinate and append corresponding direction to protein route
-            if move == "B":
-                pos_x += 1
-                protein.route.append(1)
-
-            # Place succeeding aminoacid at the updated x- and y-coordinate
-            protein.grid[pos_y][pos_x] = protein.name_list[j+1]
-            # Only add valid positions to the coordinate list (coordinates that do not yet exist)
-            if (pos_x, pos_y) not in coordinates:
-                coordinates.append((pos_x, pos_y))
-        
-        # If the coordinate list has the valid length, calculate the score of this route given the protein structure
-        if len(coordinates) == protein.length:
-            calculate_score(protein = protein)
-            
-            # If the found score is higher than the so far highest score, redefine the highest score, route, protein and grid 
-            if protein.score >= highest_score:
-                highest_score = protein.score
-                best_route = protein.route
-                best_protein = protein
-                best_grid = protein.grid
+    best_route = None
+    routes = iter(queue2)
+
+    while True:
+
+        # Take the next chunk of routes, stop if there are no routes left
+        chunk = list(islice(routes, CHUNK_SIZE))
+        if chunk == []:
+            break
+
+        # Score all routes of the chunk at once
+        chunk = route_array(chunk)
+        scores, valid = score_routes(protein_string, chunk)
+        if not valid.any():
+            continue
+
+        # If the chunk has a possible route with at least the highest score so far, take the last one of them
+        chunk_score = scores[valid].max()
+        if best_route is None or chunk_score >= highest_score:
+            highest_score = chunk_score
+            best_route = chunk[np.flatnonzero(valid & (scores == chunk_score))[-1]]
+
+    # If none of the routes is possible, there is no best protein
+    if best_route is None:
+        return None
+
+    # Define the protein object of the best route
+    best_protein = Protein.from_route(protein_string, best_route)
 
     print("best protein", best_protein.route)
-    print("best score", best_protein.score/2)
+    print("best score", best_protein.score)
     print(best_protein.bonds)
 
     return(best_protein)
@@ -331,11 +295,11 @@ def plot_best_protein(best_protein):
 #     # Asks user for the protein structure
 #     protein_string = input("Please give the protein structure: ")
 
-#     # Call function to create queue of possible routes given protein structure 
-#     queue3 = create_queue(protein_string)
+#     # Call function to generate the possible routes given protein structure 
+#     routes = generate_routes(protein_string)
 
 #     # Call function to find best protein 
-#     best_protein = make_proteins(queue3)
+#     best_protein = make_proteins(routes, protein_string)
 
 #     # Call function to plot best protein
 #     plot_best_protein(best_protein)
\ No newline at end of file
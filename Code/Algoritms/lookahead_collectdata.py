@@ -1,367 +1,377 @@
-from queue import Queue
-import copy
-from ..Classes.classes import Protein
+from ..Classes.classes import Protein, encode_route, decode_route
+from .bound import upper_bound, print_gap
+from .windows import load_windows, window_routes, window_gains, window_key, WindowCache, best_windows_pruned
 from math import floor
 import matplotlib.pyplot as plt
 import numpy as np
 import random
 import csv
+import time
+from multiprocessing import Pool
+import os
 
-def check_neighbours_h(protein, pos_x, pos_y):
+# Number of parts the window library is split into per worker process, when the windows of every step are split
+# over worker processes (see best_windows_parallel)
+WINDOW_PARTS = 4
+
+# Number of window moves from which windows are pruned instead of scored completely (see choose_window)
+PRUNE_LENGTH = 8
+
+# Cache with the best windows of the steps scored so far in this process, shared by all folds (see WindowCache)
+step_cache = WindowCache()
+
+
+def choose_window(protein, window_length, rng=random, cache=None, prune=None, pool=None, parts=None):
     """
-    Given a specific position in a given protein, this function checks whether the neighbouring aminoacids are hydrophobic. 
-    It returns a list that includes the corresponding directions to arrive at the hydrophobic neighbours. 
+    This function scores all windows of the given number of moves from the window library (see windows.py) as the 
+    next moves of the partly folded protein. Only the bonds the window adds are counted (see window_gains), the
+    protein itself is not changed. Windows never turn back on themselves, so there are 3 instead of 4 options per move. 
+    When there are more windows with the highest stability, one of them is chosen randomly with rng.
+    If a cache is given (see WindowCache), the best windows of a step that has been scored before are taken from it,
+    so only the random choice is made again. With prune=True, windows that can not reach the best stability are
+    dropped before they are scored completely (see best_windows_pruned), this gives the same best windows. This only
+    pays off for long windows, so by default (prune=None) windows of PRUNE_LENGTH moves or more are pruned.
+    If a pool is given, the windows are split into parts that are searched in its worker processes (see
+    best_windows_parallel); this gives the same best windows, so the same rng gives the same choice.
+    Returns the route of the chosen window, or None if all windows run into the protein.
     """
-    
-    # Initialize an empty list 
-    neighbours = []
 
-    # If upper neighbour is hydrophobic, add corresponding direction to the neighbours list 
-    if protein.grid[pos_y - 1][pos_x] == "H":
-        neighbours.append(2)
+    library = load_windows(window_length)
+    if prune is None:
+        prune = window_length >= PRUNE_LENGTH
+
+    # Look up the best windows of this step in the cache
+    best_windows = None
+    if cache is not None:
+        key = window_key(protein, window_length)
+        best_windows = cache.get(key)
+
+    if best_windows is None:
+
+        # Find the valid windows with the highest stability, there are none if all windows run into the protein
+        if pool is not None:
+            best_windows = best_windows_parallel(protein, window_length, pool, parts, prune)
+        elif prune:
+            best_windows, highest_gain, scored = best_windows_pruned(protein, library)
+            best_windows = best_windows.astype(np.int32)
+        else:
+            gains, valid = window_gains(protein, library)
+            if valid.any():
+                highest_gain = gains[valid].max()
+                best_windows = np.flatnonzero(valid & (gains == highest_gain)).astype(np.int32)
+            else:
+                best_windows = np.array([], dtype=np.int32)
 
-    # If lower neighbour is hydrophobic, add corresponding direction to the neighbours list                     
-    if protein.grid[pos_y + 1][pos_x] == "H":
-        neighbours.append(-2)
+        if cache is not None:
+            cache.put(key, best_windows)
 
-    # If left neighbour is hydrophobic, add corresponding direction to the neighbours list             
-    if protein.grid[pos_y][pos_x - 1] == "H":
-        neighbours.append(-1)
+    # If none of the windows is valid, there is no best window
+    if len(best_windows) == 0:
+        return None
 
-    # If right neighbour is hydrophobic, add corresponding direction to the neighbours list             
-    if protein.grid[pos_y][pos_x + 1] == "H":
-        neighbours.append(1)
+    # Choose one of the best windows randomly
+    best_index = rng.choice(best_windows)
+
+    # Translate only its turns into directions, the first move of a protein is always to the right
+    if protein.route:
+        direction = protein.route[-1]
+    else:
+        direction = 1
+
+    return window_routes(library, direction, [best_index])[0].tolist()
 
-    return neighbours
 
-def check_neighbours_c(protein, pos_x, pos_y):
+def best_windows_part(task):
     """
-    Given a specific position in a given protein, this function checks whether the neighbouring aminoacids are cysteine. 
-    It returns a list that includes the corresponding directions to arrive at the cysteine neighbours. 
+    This function finds, in a worker process, the best windows of the given number of moves among the windows with
+    the numbers from start up to end, as the next moves of the protein folded along the given route (encoded as bytes,
+    see encode_route). With prune=True the windows are pruned (see best_windows_pruned), otherwise all of them are
+    scored (see window_gains). Returns the numbers of the best windows and their stability, or no numbers and None if
+    all of them run into the protein.
     """
-    
-    # Initialize an empty list 
-    neighbours = []
 
-    # If upper neighbour is cysteine, add corresponding direction to the neighbours list       
-    if protein.grid[pos_y - 1][pos_x] == "C":
-        neighbours.append(2)
+    protein_string, route, window_length, start, end, prune = task
+    protein = Protein.from_route(protein_string, decode_route(route))
+    library = load_windows(window_length)
 
-    # If lower neighbour is cysteine, add corresponding direction to the neighbours list       
-    if protein.grid[pos_y + 1][pos_x] == "C":
-        neighbours.append(-2)
+    if prune:
+        best_windows, highest_gain, scored = best_windows_pruned(protein, library, start=start, end=end)
+        return best_windows.astype(np.int32), highest_gain
 
-    # If left neighbour is cysteine, add corresponding direction to the neighbours list
-    if protein.grid[pos_y][pos_x - 1] == "C":
-        neighbours.append(-1)
+    rows = np.arange(start, end)
+    gains, valid = window_gains(protein, library, rows)
+    if not valid.any():
+        return rows[:0].astype(np.int32), None
 
-    # If right neighbour is cysteine, add corresponding direction to the neighbours list        
-    if protein.grid[pos_y][pos_x + 1] == "C":
-        neighbours.append(1)
+    highest_gain = gains[valid].max()
+    return rows[valid & (gains == highest_gain)].astype(np.int32), highest_gain
 
-    return neighbours
 
-def calculate_score(protein):
+def best_windows_parallel(protein, window_length, pool, parts=None, prune=False):
     """
-    This function calculates the score of a protein. It loops over the protein length to first find HH- and HC-bonds.
-    Subsequently, it looks for CC-bonds. The corresponding points are added to the score. For HH- and CC-bonds the 
-    addition to the score is halved, in order to prevent duplicate bonds.
+    This function finds the best windows of the given number of moves as the next moves of the partly folded protein,
+    like choose_window, but the window library is split into parts (windows with successive numbers) that are searched
+    in the worker processes of the pool (see best_windows_part). Only the route of the protein is sent to the workers.
+    The best windows of the parts with the highest stability are joined in the order of the parts, so they are the
+    same windows, in the same order, as in this process. By default there are WINDOW_PARTS parts per core.
+    Returns the numbers of the best windows.
     """
 
-    # Define x and y coordinates as starting positions (0,0; defined in Protein class)
-    pos_x = protein.start_x
-    pos_y = protein.start_y
+    if parts is None:
+        parts = WINDOW_PARTS * os.cpu_count()
 
-    # Loop over the protein length
-    for x in range(protein.length):
+    number = len(load_windows(window_length).turns)
+    limits = np.linspace(0, number, min(parts, number) + 1).astype(np.int64)
+    route = encode_route(protein.route)
+    tasks = [(protein.name, route, window_length, int(start), int(end), prune) 
+             for start, end in zip(limits[:-1], limits[1:])]
 
-        # Check whether the aminoacid is hydrophobic              
-        if protein.name_list[x] == "H":
+    # Keep the best windows of the parts with the highest stability
+    highest_gain = None
+    best_windows = []
+    for part_windows, part_gain in pool.imap(best_windows_part, tasks):
+        if part_gain is None:
+            continue
+        if highest_gain is None or part_gain > highest_gain:
+            highest_gain = part_gain
+            best_windows = [part_windows]
+        elif part_gain == highest_gain:
+            best_windows.append(part_windows)
 
-            # If the aminoacid is hydrophobic, check the neighbouring hydrophobic aminoacids
-            neighbours_h = check_neighbours_h(protein = protein, pos_x = pos_x, pos_y = pos_y)
-            
-            # Loop over the list of (directions to) hydrophobic neighbours 
-            for i in neighbours_h:
-                
-                # If the first aminoacid is not connected to the hydrophobic neighbour, add 0.5 to the score 
-                if x == 0:
-                    if protein.route[x] != i:
-                        protein.score += 0.5
-
-                # If the final aminoacid is not connected to the hydrophobic neighbour, add 0.5 to the score
-                elif x >= len(protein.route) - 1:
-                    if protein.route[x-1] != - i :
-                        protein.score += 0.5                  
-                
-                # If any aminoacid (except the first and final) is not connected to the hydrophobic neighbour, add 0.5 to the score 
-                elif protein.route[x] != i and protein.route[x-1] != -i:
-                    protein.score += 0.5
-                
-            # If the aminoacid is hydrophobic, check the neighbouring cysteine aminoacids
-            neighbours_c = check_neighbours_c(protein = protein, pos_x = pos_x, pos_y = pos_y)
-            
-            # Loop over the list of (directions to) cysteine neighbours 
-            for i in neighbours_c:
-                
-                # If the first aminoacid is not connected to the cysteine neighbour, add 1.0 to the score 
-                if x == 0:
-                    if protein.route[x] != i:
-                        protein.score += 1
-                
-                # If the final aminoacid is not connected to the cysteine neighbour, add 1.0 to the score
-                elif x >= len(protein.route) - 1:
-                    if protein.route[x-1] != - i :
-                        protein.score += 1                  
-                
-                # If any aminoacid (but the first and final) is not connected to the cysteine neighbour, add 1.0 to the score 
-                elif protein.route[x] != i and protein.route[x-1] != -i:
-                    protein.score += 1
-
-        # Check whether the aminoacid is a cysteine aminoacid
-        if protein.name_list[x] == "C":
-            
-            # If the aminoacid is cysteine, check the neighbouring cysteine aminoacids 
-            # Neighbouring hydrophobic aminoacids are not checked as HC/CH-bonds are already found in the previous part (line 173 - 191)
-            neighbours_c = check_neighbours_c(protein = protein, pos_x = pos_x, pos_y = pos_y)
-            
-            # Loop over the list of (directions to) cysteine neighbours 
-            for i in neighbours_c:
-
-                # If the first aminoacid is not connected to the cysteine neighbour, add 1.0 to the score 
-                if x == 0:
-                    if protein.route[x] != i:
-                        protein.score += 2.5
-                      
-                # If the final aminoacid is not connected to the cysteine neighbour, add 1.0 to the score  
-                elif x >= len(protein.route) - 1:
-                    if protein.route[x-1] != - i :
-                        protein.score += 2.5                 
-
-                # If any aminoacid (but the first and final) is not connected to the cysteine neighbour, add 1.0 to the score 
-                elif protein.route[x] != i and protein.route[x-1] != -i:
-                    protein.score += 2.5
-
-        # As long as x is within the range of the route length, 
-        if x < len(protein.route):
-            
-            # If the move is horizontal, adapt the x-coordinate 
-            if abs(protein.route[x]) <= 1:
-                pos_x += protein.route[x]
-
-            # If the move is vertical, adapt the y-coordinate
-            else:
-                pos_y -= int(protein.route[x]/2)
+    if highest_gain is None:
+        return np.array([], dtype=np.int32)
+
+    return np.concatenate(best_windows)
 
 
-def create_queue(constant_string, protein_string):
+def fold_protein(protein_string, lookahead=6, rng=random, pool=None, cache=None, stride=1, parts=None):
     """
-    This function creates a queue varying all possible directions the protein could fold into, given the protein name. 
-    Returns the queue with the complete routes. 
+    This function folds the protein once with the look-ahead algoritm: for every aminoacid, all routes of the next
+    lookahead aminoacids are scored and the first move of the best one is fixed. Ties are broken randomly with rng.
+    With a stride larger than one, the first stride moves of the best route are fixed at once, so the routes only have
+    to be scored for every stride-th aminoacid (faster, but the later moves are chosen with less look-ahead).
+    The fixed part of the route is kept as one protein that grows move by move, and the routes of the next aminoacids
+    are taken from the window library and scored on the bonds they add (see choose_window). If a pool is given, 
+    the window library is split into parts that are searched in its worker processes (see best_windows_parallel).
+    With a cache, steps that have been scored before in an earlier fold are not scored again (see choose_window).
+    Returns the folded protein, or 0 if the protein got stuck.
     """
 
-    # Define the desired length of the route 
-    depth = len(protein_string) - 1 
-
-    # Create queue
-    queue = Queue()
-
-    # Initialize empty list for complete routes
-    queue2 = []
-
-    # Start queue with empty string
-    queue.put("")
-
-    # Checks if there are elements left in queue
-    while not queue.empty():
-        
-        # Get first element from queue
-        state = queue.get()
-        
-        # Append direction to route as long as the depth is not reached
-        if len(state) < depth:
-            
-            # Iterate over possible directions
-            for i in ['A', 'B', 'C', 'D']:
-                child = copy.deepcopy(state)
-                child += i
-                queue.put(child)
-                
-                # Append to list if route is of desired length
-                if len(state) == depth - 1:
-                    queue2.append(child)
+    # The protein with the so far fixed part of the route
+    protein = Protein(protein_string)
+
+    # Loop over the protein characters, until all aminoacids are placed
+    i = 0
+    while i < len(protein_string) - 1:
+
+        # Define substring as the next lookahead characters
+        substring = protein_string[i:i+lookahead]
 
-    return queue2
+        # Find the best route of the next aminoacids, in the worker processes if there is a pool; a look-ahead of one
+        # aminoacid still needs a window of one move
+        best_window = choose_window(protein, max(len(substring) - 1, 1), rng, cache, pool=pool, parts=parts)
+        if best_window is None:
+            return 0
 
-def make_proteins(path, substring, queue2):
+        # Add the next steps to definite route
+        for direction in best_window[:stride]:
+            protein.move(direction)
+            i += 1
+
+    return protein
+
+
+def first_move_margin(gains, valid, library):
+    """
+    This function calculates how clearly the best window decides the next move: the difference between the highest
+    stability of the windows with the best first move and of the windows with any other first move. The margin is 0
+    if windows with different first moves share the highest stability, and None if only one first move is possible.
     """
-    This function loops through the queue with the proteins found and returns the protein with the highest stability.
-    """   
 
-    # Initialize integer to save highest score
-    highest_score = 0
+    best_per_move = []
+    for turn in (1, 0, -1):
+        move_valid = valid & (library.turns[:, 0] == turn)
+        if move_valid.any():
+            best_per_move.append(gains[move_valid].max())
 
-    # Initialize empty list to append best proteins to
-    all_proteins = []
+    if len(best_per_move) < 2:
+        return None
 
-    # Initialize empty list to append other proteins to
-    best_proteins = []
+    best_per_move.sort(reverse=True)
+    return best_per_move[0] - best_per_move[1]
 
-    # Initialize best grid to none
-    best_grid = None
-    
-    # Loop through all proteins
-    for i in queue2:
-
-        # Initialize empty list to save coordinates
-        coordinates = []    
-
-        # Make protein
-        protein = Protein(path + substring)
-
-        # Initialize starting position
-        pos_x = protein.start_x
-        pos_y = protein.start_y
-
-        # Append first coordinate
-        coordinates.append((pos_x, pos_y))
-
-        # Make list variable to iterate over route
-        lijst = list(i)
-
-        # Change starting position to first amino acid name
-        protein.grid[pos_y][pos_x] = protein.name_list[0]
-        
-        # Iterate over route
-        for j in range(protein.length - 1):
-            
-            # Find movement
-            move = lijst[j]
-
-            # If move is upwards, change y coordinate and append to route
-            if move == "A":
-                pos_y -= 1
-                protein.route.append(2)
-
-            # If move is downwards, change y coordinate and append to route
-            if move == "C":
-                pos_y += 1
-                protein.route.append(-2)
-
-            # If move is to the left, change x coordinate and append to route
-            if move == "D":
-                pos_x -= 1
-                protein.route.append(-1)
-
-            # If first move is to the right, change x coordinate and append to route
-            if move == "B":
-                pos_x += 1
-                protein.route.append(1)
-
-            # Change next position in list to next amino acid element 
-            protein.grid[pos_y][pos_x] = protein.name_list[j+1]
-            
-            # If the coordinate is not taken yet, append to list with coordinates
-            if (pos_x, pos_y) not in coordinates:
-                coordinates.append((pos_x, pos_y))
-
-        # Check if there are no coordinates double in use to prevent invalid proteins
-        if len(coordinates) == protein.length:
-            
-            # Calculate stability of protein
-            calculate_score(protein = protein)
-
-            # Check if stability is higher then the ones found yet
-            if protein.score > highest_score:
-                
-                # If so, save protein
-                best_proteins = []
-                highest_score = protein.score
-                best_proteins.append(protein)
-
-            # Check if stability is as high as the ones found, if so: save to list
-            elif protein.score == highest_score  :
-                best_proteins.append(protein)
-            
-            # If not, save protein to list of other proteins
-            else:
-                all_proteins.append(protein)
 
-    # If there are proteins with a higher score than 0, choose one randomly 
-    if best_proteins != []:
-        best_protein = random.choice(best_proteins)
+def fold_protein_adaptive(protein_string, min_lookahead=3, max_lookahead=6, rng=random, margin=0, max_evaluations=None, 
+                          max_time=None, cache=None):
+    """
+    This function folds the protein once with the look-ahead algoritm, but decides the look-ahead per aminoacid: every 
+    step starts with min_lookahead and only looks max_lookahead aminoacids ahead if the best windows do not clearly
+    decide the next move, i.e. if the first move margin (see first_move_margin) is not larger than margin. 
+    Looking further ahead stops when the fold has used max_evaluations scored windows or max_time seconds.
+    The deep windows are chosen with choose_window, so they are pruned and taken from the cache if one is given.
+    Ties are broken randomly with rng. Returns the folded protein, or 0 if the protein got stuck.
+    """
 
-    # If not, choose one random other protein
+    protein = Protein(protein_string)
+    evaluations = 0
+    start_time = time.time()
+
+    while len(protein.xs) < len(protein_string):
+        remaining = len(protein_string) - len(protein.xs)
+
+        library = load_windows(min(max(min_lookahead - 1, 1), remaining))
+        gains, valid = window_gains(protein, library)
+        evaluations += len(gains)
+
+        # Stop if all windows run into the protein
+        if not valid.any():
+            return 0
+
+        # Look further ahead only if the next move is unclear, possible and within the budget
+        move_margin = first_move_margin(gains, valid, library)
+        deep = move_margin is not None and move_margin <= margin
+        if min_lookahead >= max_lookahead or min_lookahead - 1 >= remaining:
+            deep = False
+        if max_evaluations is not None and evaluations >= max_evaluations:
+            deep = False
+        if max_time is not None and time.time() - start_time >= max_time:
+            deep = False
+
+        if deep:
+            window_length = min(max(max_lookahead - 1, 1), remaining)
+            best_window = choose_window(protein, window_length, rng, cache)
+            evaluations += len(load_windows(window_length).turns)
+            if best_window is None:
+                return 0
+            protein.move(best_window[0])
+            continue
+
+        # Choose one of the valid windows with the highest stability randomly and fix its first move
+        highest_gain = gains[valid].max()
+        best_index = rng.choice(np.flatnonzero(valid & (gains == highest_gain)))
+        if protein.route:
+            direction = protein.route[-1]
+        else:
+            direction = 1
+        protein.move(int(window_routes(library, direction, [best_index])[0, 0]))
+
+    return protein
+
+
+def run_trial(task):
+    """
+    This function folds the protein once in a worker process, with its own random.Random instance. The folds of
+    the same worker share the step cache of the worker, if use_cache is True. Returns the route of the protein encoded as bytes (see encode_route), or None if the protein got stuck.
+    """
+
+    protein_string, lookahead, seed, use_cache, stride, adaptive = task
+    if adaptive is not None:
+        min_lookahead, max_evaluations, max_time = adaptive
+        protein = fold_protein_adaptive(protein_string, min_lookahead, lookahead, random.Random(seed),
+                                        max_evaluations=max_evaluations, max_time=max_time,
+                                        cache=step_cache if use_cache else None)
+    elif use_cache:
+        protein = fold_protein(protein_string, lookahead, random.Random(seed), cache=step_cache, stride=stride)
     else:
-        if all_proteins == []:
-            return 0 
-        best_protein = random.choice(all_proteins)
+        protein = fold_protein(protein_string, lookahead, random.Random(seed), stride=stride)
+
+    if protein == 0:
+        return None
 
-    return(best_protein)
+    return encode_route(protein.route)
 
-def generate_data(times, protein_string):
+
+def generate_data(times, protein_string, lookahead=6, workers=1, seed=None, split_windows=False, cache=True, stride=1,
+                  min_lookahead=None, max_evaluations=None, max_time=None):
     """
-    This function creates all possible routes for a protein x times (indicated by the user) and 
+    This function folds a protein x times (indicated by the user) with the look-ahead algoritm and 
     writes the results (protein route and score) in the result file. This file can be used to create histograms.
+    With more than one worker, the trials are spread over a pool of worker processes (workers=None uses all cores), 
+    each with its own seed derived from seed, and their routes are written to the result file as they come in.
+    In a single process (or with split_windows) all folds draw from one random.Random(seed).
+    For a deep look-ahead (8 or more), split_windows=True spreads the windows of every single step over the workers 
+    instead, and the trials are run one after another.
+    With cache=True, the folds share a cache with the best windows of every step (see WindowCache), so steps that
+    have been scored in an earlier fold only need a new random choice. The first stride moves of the best route are
+    fixed at once (see fold_protein).
+    If min_lookahead is given, every fold decides its look-ahead per aminoacid between min_lookahead and lookahead,
+    within a budget of max_evaluations scored windows or max_time seconds per fold (see fold_protein_adaptive); every
+    fold starts with a new budget, it is not shared by the whole run. An adaptive look-ahead can not be combined with
+    split_windows or a stride larger than one, this raises a ValueError.
+    It stops early when a protein reaches the upper bound of the protein structure (see bound.py), and prints the gap
+    between the highest score and the upper bound.
     """ 
-    best_protein = None
-    # Loop over number of times to run the algoritm (indicated by user)
-    for a in range(times):
+    if min_lookahead is not None and split_windows:
+        raise ValueError("an adaptive look-ahead (min_lookahead) can not be combined with split_windows")
+    if min_lookahead is not None and stride != 1:
+        raise ValueError("an adaptive look-ahead (min_lookahead) fixes one move per step, stride must be 1")
 
-        # Set look ahead variable to four aminoacids
-        lookahead = 6
+    highest_score = 0
 
-        # Initialize path 
-        path = ""
+    # Highest score that any protein of this structure can have
+    bound = upper_bound(protein_string)
 
-        # Initialize constant string: so far fixed part of the route
-        constant_string = ""
+    if cache:
+        cache = step_cache
+    else:
+        cache = None
 
-        # Loop over the protein characters
-        for i in range(len(protein_string)-1):
+    if min_lookahead is not None:
+        adaptive = (min_lookahead, max_evaluations, max_time)
+    else:
+        adaptive = None
+
+    # Make the window libraries before the worker processes start, so the workers only have to read them
+    if workers != 1:
+        for window_length in range(1, max(min(lookahead, len(protein_string)), 2)):
+            load_windows(window_length)
+
+    # Fold the protein in this process, or in a pool of worker processes
+    rng = random.Random(seed)
+    pool = None
+    if workers == 1 and adaptive is not None:
+        proteins = (fold_protein_adaptive(protein_string, min_lookahead, lookahead, rng,
+                                          max_evaluations=max_evaluations, max_time=max_time, cache=cache)
+                    for a in range(times))
+    elif workers == 1:
+        proteins = (fold_protein(protein_string, lookahead, rng, cache=cache, stride=stride) for a in range(times))
+    elif split_windows:
+        pool = Pool(workers)
+        parts = WINDOW_PARTS * (workers or os.cpu_count())
+        proteins = (fold_protein(protein_string, lookahead, rng, pool, cache, stride, parts) for a in range(times))
+    else:
+        seeds = np.random.SeedSequence(seed).generate_state(times)
+        tasks = [(protein_string, lookahead, int(trial_seed), cache is not None, stride, adaptive) 
+                 for trial_seed in seeds]
+        pool = Pool(workers)
+        proteins = (Protein.from_route(protein_string, decode_route(route)) if route is not None else 0
+                    for route in pool.imap_unordered(run_trial, tasks))
+
+    # Loop over the folded proteins (as many as indicated by user), the pool is always closed afterwards
+    try:
+        for best_protein in proteins:
+
+            if best_protein != 0:
+                # Print the best score
+                print("hoogste score", best_protein.score)
+                
+                # Write best routes and scores in the result file 
+                f = open("resultfile_lookahead", "a")
+                with f:
+                    writer = csv.writer(f)
+                    writer.writerow(["Lookahead", best_protein.route, best_protein.score])
 
-            # Define substring as final four characters
-            substring = protein_string[i:i+lookahead]
+                highest_score = max(highest_score, best_protein.score)
 
-            # Create all possible routes
-            queue = create_queue(constant_string, substring)
-            
-            # Add the previous steps to the route
-            for j in range(len(queue)):
-                queue[j] = constant_string + queue[j]
+                # Stop if the upper bound is reached, no protein can do better
+                if highest_score >= bound:
+                    break
 
-            # Find protein with highest stability 
-            best_protein = make_proteins(path, substring, queue)
-            
-            
-            # If protein is invalid, skip to next iteration
-            if best_protein == 0:
-                break
+    finally:
+        if pool is not None:
+            pool.terminate()
 
-            # Define next step in route
-            else:
-                if best_protein.route[i] == 1:
-                    add = "B"
-                if best_protein.route[i] == -1:
-                    add = "D"
-                if best_protein.route[i] == 2:
-                    add = "A"
-                if best_protein.route[i] == -2:
-                    add = "C"
-
-                # Add step to definite route
-                constant_string += add  
-                path += str(best_protein.name[i])
-
-        if best_protein != 0 and best_protein != None:
-            # Print the best score
-            print("hoogste score", best_protein.score)
-            
-            # Write best routes and scores in the result file 
-            f = open("resultfile_lookahead", "a")
-            with f:
-                writer = csv.writer(f)
-                writer.writerow(["Lookahead", best_protein.route, best_protein.score])
+    print_gap(highest_score, bound)
 
 
 # if __name__ == "__main__":
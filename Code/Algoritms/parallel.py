@@ -0,0 +1,160 @@
+from ..Classes.classes import Protein, encode_route, decode_route
+from . import random as random_algorithm
+from . import greedy_collectdata
+from .bound import upper_bound, print_gap
+from multiprocessing import Pool
+from collections import Counter
+import numpy as np
+import random
+import os
+import time
+
+# Number of trials that share one seed, the seeds do not depend on the number of workers
+BLOCK_SIZE = 100
+
+# Most trials that one worker runs at a time
+SHARD_SIZE = 10000
+
+# Function that folds one protein, per algorithm
+CREATE_FUNCTIONS = {
+    "random": random_algorithm.create_random,
+    "greedy": greedy_collectdata.create_random,
+}
+
+
+def make_shards(times, seed=None, workers=None):
+    """
+    This function divides the trials into blocks of BLOCK_SIZE trials and gives every block its own seed. The seeds
+    are derived from the given seed, so the same seed always gives the same trials, whatever the number of workers.
+    The blocks are divided over at least as many shards as there are workers (all cores if workers is None), with at
+    most SHARD_SIZE trials per shard. Returns a list with (first trial, number of trials, block seeds) per shard.
+    """
+
+    if workers is None:
+        workers = os.cpu_count()
+
+    number_of_blocks = max(1, -(-times // BLOCK_SIZE))
+    seeds = [int(block.generate_state(1)[0]) for block in np.random.SeedSequence(seed).spawn(number_of_blocks)]
+
+    # Every shard gets a run of successive blocks
+    number_of_shards = min(number_of_blocks, max(workers, -(-times // SHARD_SIZE)))
+    shards = []
+    for blocks in np.array_split(np.arange(number_of_blocks), number_of_shards):
+        first_trial = int(blocks[0]) * BLOCK_SIZE
+        trials = min(len(blocks) * BLOCK_SIZE, times - first_trial)
+        shards.append((first_trial, trials, seeds[blocks[0]:blocks[-1] + 1]))
+
+    return shards
+
+
+def run_shard(task):
+    """
+    This function runs the trials of one shard in a worker process, with a random.Random instance per block.
+    Only the best top proteins of every block are kept, as encoded routes (see encode_route) instead of Protein
+    objects. The shard stops after the first block in which a protein reaches the bound.
+    Returns a list with, per block, the number of valid proteins, a Counter of their scores and a list with
+    (score, trial, route) of the best proteins.
+    """
+
+    algorithm, protein_structure, first_trial, trials, seeds, top, bound = task
+    create_random = CREATE_FUNCTIONS[algorithm]
+    blocks = []
+
+    for block_start in range(first_trial, first_trial + trials, BLOCK_SIZE):
+
+        # Every block starts with its own seed
+        rng = random.Random(seeds[(block_start - first_trial) // BLOCK_SIZE])
+        valid = 0
+        scores = Counter()
+        best = []
+
+        for trial in range(block_start, min(block_start + BLOCK_SIZE, first_trial + trials)):
+
+            # Fold a protein, skip it if it got stuck
+            protein = Protein(protein_structure)
+            create_random(protein, rng=rng)
+            if protein.wrong_protein:
+                continue
+
+            valid += 1
+            scores[protein.score] += 1
+
+            # Keep the protein if it is one of the best ones so far
+            if len(best) < top or protein.score > best[-1][0]:
+                best.append((protein.score, trial, encode_route(protein.route)))
+                best.sort(key=lambda item: (-item[0], item[1]))
+                del best[top:]
+
+        blocks.append((valid, scores, best))
+
+        # The blocks after the one that reaches the bound are not needed
+        if best and best[0][0] >= bound:
+            break
+
+    return blocks
+
+
+def find_optimum(times, protein_structure, algorithm="random", workers=None, seed=None, top=10):
+    """
+    This function runs the random or greedy algorithm (indicated by algorithm) times times, spread over a pool of
+    workers processes (all cores if workers is None). Every worker keeps only its best top proteins and sends back
+    their routes, the best ones of all workers are merged. The results are merged block by block in the order of
+    the trials, and as soon as a protein reaches the upper bound of the protein structure (see bound.py) the later
+    blocks are dropped and the workers are stopped, so the same seed gives the same results whatever the number of
+    workers.
+    Prints the best route, score, number of valid proteins and gap, and returns the best proteins (best first) and
+    a Counter with the scores of all valid proteins. Returns 0 if none of the proteins is valid.
+    """
+
+    bound = upper_bound(protein_structure)
+    tasks = [(algorithm, protein_structure, first_trial, trials, seeds, top, bound)
+             for first_trial, trials, seeds in make_shards(times, seed, workers)]
+
+    valid = 0
+    scores = Counter()
+    best = []
+    start_time = time.time()
+
+    with Pool(workers) as pool:
+
+        # Merge the results of the blocks in the order of the trials
+        for blocks in pool.imap(run_shard, tasks):
+            for block_valid, block_scores, block_best in blocks:
+                valid += block_valid
+                scores.update(block_scores)
+                best.extend(block_best)
+                best.sort(key=lambda item: (-item[0], item[1]))
+                del best[top:]
+
+                # Drop the later blocks if the upper bound is reached
+                if best and best[0][0] >= bound:
+                    break
+
+            # Stop all workers if the upper bound is reached
+            if best and best[0][0] >= bound:
+                pool.terminate()
+                break
+
+    if best == []:
+        return 0
+
+    # Make the best proteins from their routes
+    best_proteins = [Protein.from_route(protein_structure, decode_route(route)) for score, trial, route in best]
+
+    print("beste protein:", best_proteins[0].route)
+    print("beste score:", best_proteins[0].score)
+    print("valid proteins:", valid)
+    print("time:", time.time() - start_time)
+    print_gap(best_proteins[0].score, bound)
+
+    return best_proteins, scores
+
+
+if __name__ == "__main__":
+
+    # Asks user for the algorithm, the number of times to run it and the protein structure
+    algorithm = input("Please choose the algoritm (random or greedy): ")
+    times_number = int(input("Please indicate the number of times to repeat the algoritm: "))
+    protein_structure = input("Please give the protein structure: ")
+
+    find_optimum(times_number, protein_structure, algorithm=algorithm)
@@ -0,0 +1,193 @@
+from ..Classes.classes import Protein, ENERGY_TABLE
+from .bound import upper_bound, print_gap
+from .beamsearch import next_directions
+from .breadthfirst import plot_best_protein
+from math import exp, log
+import random
+import time
+
+
+class Perm:
+    """
+    This class folds a protein with the pruned-enriched Rosenbluth method (PERM). Like the random algoritm, a chain is
+    grown one aminoacid at a time, but the next spot is chosen among the free spots with a chance that grows with the
+    stability it adds (exp(beta * stability)), and a chain that gets stuck is not thrown away as a whole: every chain
+    has a weight that corrects for these choices, and when it grows much larger than the mean weight of chains of the
+    same length, the chain is cloned (enriched), when it is much smaller the chain is stopped with a chance of one half
+    (pruned). Like in nPERMis, the clones of a chain take different next spots, so they do not grow the same chains
+    twice. The chains are grown depth-first, on one protein, with move and undo.
+    """
+
+    def __init__(self, protein_string, beta=2.0, upper=3.0, lower=0.3, rng=random, table=ENERGY_TABLE):
+        self.protein_string = protein_string
+        self.beta = beta
+        self.rng = rng
+        self.table = table
+
+        # Log of the factors above and below the mean weight at which chains are cloned or pruned
+        self.log_upper = log(upper)
+        self.log_lower = log(lower)
+
+        # Log of the summed weight and the number of chains per length, to estimate the mean weight
+        self.log_weights = [None] * (len(protein_string) + 1)
+        self.chains = [0] * (len(protein_string) + 1)
+
+        self.best_protein = None
+        self.best_score = -1
+        self.nodes = 0
+        self.max_nodes = None
+
+    def add_weight(self, length, log_weight):
+        """
+        Adds the (log) weight of a chain of the given length to the summed weights, and returns the log of the mean
+        weight of the chains of that length so far.
+        """
+
+        # Add the weights in log space, the weights themselves grow too large for long chains
+        total = self.log_weights[length]
+        if total is None:
+            total = log_weight
+        elif total > log_weight:
+            total += log(1 + exp(log_weight - total))
+        else:
+            total = log_weight + log(1 + exp(total - log_weight))
+
+        self.log_weights[length] = total
+        self.chains[length] += 1
+
+        return total - log(self.chains[length])
+
+    def pick_directions(self, directions, factors, number):
+        """
+        Chooses number different directions (at most three), one after another, each with a chance in proportion to
+        its factor among the directions that have not been chosen yet. Returns a list with every chosen direction, its
+        factor and the chance that it is among the chosen directions.
+        """
+
+        total = sum(factors)
+        chances = [factor / total for factor in factors]
+
+        # All directions are chosen, or a direction is chosen first or second after one of the other directions
+        if number == len(directions):
+            chances = [1.0] * number
+        elif number == 2:
+            chances = [chances[a] + sum(chances[b] * chances[a] / (1 - chances[b])
+                                        for b in range(len(chances)) if b != a)
+                       for a in range(len(chances))]
+
+        indices = list(range(len(directions)))
+        weights = list(factors)
+        chosen = []
+        for pick in range(number):
+            index = indices.pop(self.rng.choices(range(len(indices)), weights)[0])
+            weights = [factors[i] for i in indices]
+            chosen.append((directions[index], factors[index], chances[index]))
+
+        return chosen
+
+    def grow(self, protein, log_weight):
+        """
+        Grows the chain of the protein by one aminoacid (and the rest of the chain recursively), with the given log
+        weight of the chain so far. Complete chains are compared with the best protein.
+        """
+
+        # Stop if the chain is complete
+        length = len(protein.xs)
+        if length == len(self.protein_string):
+            if protein.score > self.best_score:
+                self.best_score = protein.score
+                self.best_protein = protein.copy()
+            return
+
+        # Stop if there is no time left
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            return
+        self.nodes += 1
+
+        # Find the free spots and the Boltzmann factor of the stability they add
+        directions = []
+        factors = []
+        for direction in next_directions(protein):
+            gain = protein.move(direction)
+            if not protein.wrong_protein:
+                directions.append(direction)
+                factors.append(exp(self.beta * gain))
+            protein.undo()
+
+        # A chain that is stuck dies
+        if directions == []:
+            return
+
+        # The weight of the longer chain is multiplied by the sum of the factors (Rosenbluth weight)
+        total = sum(factors)
+        log_weight += log(total)
+        log_mean = self.add_weight(length + 1, log_weight)
+
+        # Clone chains with a large weight, more copies the larger the weight (at most one per free spot), prune chains
+        # with a small weight
+        copies = 1
+        if log_weight > log_mean + self.log_upper:
+            copies = min(len(directions), int(exp(log_weight - log_mean - self.log_upper)) + 1)
+        elif log_weight < log_mean + self.log_lower:
+            if self.rng.random() < 0.5:
+                return
+            log_weight += log(2)
+
+        # Every copy takes a different next spot, chosen with a chance in proportion to its factor; its weight is
+        # corrected by the chance that the spot is chosen, so the weights stay unbiased (as in nPERMis)
+        for direction, factor, chance in self.pick_directions(directions, factors, copies):
+            protein.move(direction)
+            self.grow(protein, log_weight + log(factor / total) - log(chance))
+            protein.undo()
+
+    def tour(self):
+        """
+        Grows all chains of one tour, starting from the first aminoacid.
+        """
+
+        self.grow(Protein(self.protein_string, self.table), 0.0)
+
+
+def find_optimum(tours, protein_structure, beta=2.0, max_nodes=None, rng=random):
+    """
+    This function runs tours tours of PERM (see the Perm class) on the protein structure, or until max_nodes chains
+    have been grown, and stops early when the best protein reaches the upper bound (see bound.py). Prints the best
+    route, score, number of grown chains and gap, and returns the best protein, or 0 if no chain was completed.
+    """
+
+    bound = upper_bound(protein_structure)
+    perm = Perm(protein_structure, beta, rng=rng)
+    perm.max_nodes = max_nodes
+    start_time = time.time()
+
+    for tour in range(tours):
+        perm.tour()
+
+        # Stop if the upper bound or the maximum number of chains is reached
+        if perm.best_score >= bound:
+            break
+        if max_nodes is not None and perm.nodes >= max_nodes:
+            break
+
+    if perm.best_protein is None:
+        return 0
+
+    print("beste protein:", perm.best_protein.route)
+    print("beste score:", perm.best_score)
+    print("nodes:", perm.nodes)
+    print("time:", time.time() - start_time)
+    print_gap(perm.best_score, bound)
+
+    return perm.best_protein
+
+
+if __name__ == "__main__":
+
+    # Asks user for the protein structure and the number of tours
+    protein_string = input("Please give the protein structure: ")
+    tours = int(input("Please indicate the number of tours: "))
+
+    # Fold the protein and plot the best one
+    best_protein = find_optimum(tours, protein_string)
+    if best_protein != 0:
+        plot_best_protein(best_protein)
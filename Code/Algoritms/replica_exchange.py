@@ -0,0 +1,133 @@
+from ..Classes.classes import Protein, encode_route, decode_route
+from . import random as random_algorithm
+from .annealing import Fold
+from .bound import upper_bound, print_gap
+from .breadthfirst import plot_best_protein
+from multiprocessing import Pool
+from math import exp
+import numpy as np
+import random
+import time
+
+
+def temperature_ladder(replicas, min_temperature, max_temperature):
+    """
+    This function returns the temperatures of the replicas, from low to high, with the same factor between every two
+    successive temperatures.
+    """
+
+    if replicas == 1:
+        return [min_temperature]
+
+    factor = (max_temperature / min_temperature) ** (1 / (replicas - 1))
+    return [min_temperature * factor ** replica for replica in range(replicas)]
+
+
+def run_replica(task):
+    """
+    This function runs steps Monte Carlo steps (end moves, corner flips and pull moves, see annealing.Fold) at a fixed
+    temperature in a worker process, starting from the given encoded route (see encode_route). Returns the encoded
+    route and score of the fold after the last step, and of the best fold that was found.
+    """
+
+    protein_structure, route, temperature, steps, seed = task
+    rng = random.Random(seed)
+
+    fold = Fold(Protein.from_route(protein_structure, decode_route(route)))
+    best_score = fold.score
+    best_route = route
+
+    for step in range(steps):
+        if fold.step(temperature, rng) and fold.score > best_score:
+            best_score = fold.score
+            best_route = encode_route(fold.route())
+
+    return encode_route(fold.route()), fold.score, best_route, best_score
+
+
+def find_optimum(protein_structure, rounds=100, steps=5000, replicas=8, min_temperature=0.25, max_temperature=2.0,
+                 workers=None, seed=None):
+    """
+    This function folds the protein structure with replica exchange Monte Carlo (parallel tempering): every replica
+    is a fold at its own temperature (see temperature_ladder), started from a random fold. Every round, all replicas
+    run steps Monte Carlo steps at the same time in a pool of workers processes (all cores if workers is None), and
+    afterwards neighbouring temperatures swap their folds with chance exp((1/T_low - 1/T_high) * (S_high - S_low)),
+    alternating between the even and odd pairs. Only the routes are sent between the processes, as bytes. Stops early
+    when the upper bound is reached (see bound.py). Prints the best route, score, part of the swaps that were
+    accepted and gap, and returns the best protein.
+    """
+
+    bound = upper_bound(protein_structure)
+    temperatures = temperature_ladder(replicas, min_temperature, max_temperature)
+    seeds = np.random.SeedSequence(seed)
+    rng = random.Random(int(seeds.generate_state(1)[0]))
+    start_time = time.time()
+
+    # Start every replica from a random fold
+    routes = []
+    scores = []
+    for replica in range(replicas):
+        protein = Protein(protein_structure)
+        random_algorithm.create_random(protein, rng=rng, check_traps=True)
+        while protein.wrong_protein:
+            protein = Protein(protein_structure)
+            random_algorithm.create_random(protein, rng=rng, check_traps=True)
+        routes.append(encode_route(protein.route))
+        scores.append(protein.score)
+
+    best_score = max(scores)
+    best_route = routes[scores.index(best_score)]
+    swaps = 0
+    accepted = 0
+
+    with Pool(workers) as pool:
+        for round_number in range(rounds):
+
+            # Run all replicas, every one with its own seed
+            round_seeds = [int(sequence.generate_state(1)[0]) for sequence in seeds.spawn(replicas)]
+            tasks = [(protein_structure, routes[replica], temperatures[replica], steps, round_seeds[replica])
+                     for replica in range(replicas)]
+            results = pool.map(run_replica, tasks)
+
+            for replica, (route, score, replica_best_route, replica_best_score) in enumerate(results):
+                routes[replica] = route
+                scores[replica] = score
+                if replica_best_score > best_score:
+                    best_score = replica_best_score
+                    best_route = replica_best_route
+
+            # Stop if the upper bound is reached
+            if best_score >= bound:
+                break
+
+            # Swap the folds of neighbouring temperatures
+            for low in range(round_number % 2, replicas - 1, 2):
+                high = low + 1
+                swaps += 1
+                exponent = (1 / temperatures[low] - 1 / temperatures[high]) * (scores[high] - scores[low])
+                if exponent >= 0 or rng.random() < exp(exponent):
+                    accepted += 1
+                    routes[low], routes[high] = routes[high], routes[low]
+                    scores[low], scores[high] = scores[high], scores[low]
+
+    best_protein = Protein.from_route(protein_structure, decode_route(best_route))
+
+    print("beste protein:", best_protein.route)
+    print("beste score:", best_protein.score)
+    if swaps > 0:
+        print("accepted swaps:", accepted / swaps)
+    print("time:", time.time() - start_time)
+    print_gap(best_protein.score, bound)
+
+    return best_protein
+
+
+if __name__ == "__main__":
+
+    # Asks user for the protein structure and the number of rounds
+    protein_string = input("Please give the protein structure: ")
+    rounds = int(input("Please indicate the number of rounds: "))
+
+    # Fold the protein and plot the best one
+    best_protein = find_optimum(protein_string, rounds)
+    plot_best_protein(best_protein)
@@ -0,0 +1,124 @@
+import numpy as np
+from ..Classes.classes import Sequence, AMINO_CODES, KEY_STRIDE, ENERGY_TABLE, make_energy_table, contact_energy
+
+# Directions belonging to the letters used in the queues of breadthfirst and lookahead
+LETTER_DIRECTIONS = {"A": 2, "B": 1, "C": -2, "D": -1}
+
+# Change of the x- and y-coordinate for every direction, indexed by direction + 2
+STEP_X = np.array([0, -1, 0, 1, 0], dtype=np.int32)
+STEP_Y = np.array([1, 0, 0, 0, -1], dtype=np.int32)
+
+# Maximum number of (folding, aminoacid, aminoacid) entries that score_routes handles at once
+BATCH_ENTRIES = 1 << 22
+
+
+def calculate_score(protein, table=None):
+    """
+    This function calculates the score of a protein. It places the aminoacids again one by one and looks up the
+    aminoacids on the four neighbouring spots of every H- and C-aminoacid. Every bond with an aminoacid that is not
+    connected to it in the route is counted once, from the aminoacid with the highest index, and its stability is looked
+    up in the energy table (by default the table of the protein). The bonds are listed in the same order as
+    Protein.move adds them, so the protein can still be taken back with Protein.undo.
+    The score is saved in protein.score, the bonds (pairs of aminoacid indices) in protein.bonds. Returns the score.
+    """
+
+    if table is None:
+        table = protein.table
+
+    codes = protein.profile.codes
+    xs = protein.xs
+    ys = protein.ys
+
+    score = 0
+    bonds = []
+
+    # The aminoacids placed so far
+    occupied = {}
+
+    for i in range(len(xs)):
+        key = xs[i] * KEY_STRIDE + ys[i]
+
+        # Count the bonds with the aminoacids earlier in the route that are not connected to this one
+        score += contact_energy(occupied, codes, table, i, key, bonds)
+        occupied[key] = i
+
+    protein.score = score
+    protein.bonds = bonds
+
+    return score
+
+
+def route_array(routes):
+    """
+    This function converts a collection of routes of equal length into an (N, L-1) array of directions. The routes can be
+    given as an array, as lists of directions (2, -2, -1, 1) or as strings of the letters A, B, C and D.
+    """
+
+    # Arrays and lists of directions can be converted directly
+    if isinstance(routes, np.ndarray):
+        return routes.astype(np.int8, copy=False).reshape(len(routes), -1)
+
+    routes = list(routes)
+    if routes == [] or not isinstance(routes[0], str):
+        return np.array(routes, dtype=np.int8).reshape(len(routes), -1)
+
+    # Translate the letters of all strings at once
+    letters = np.zeros(256, dtype=np.int8)
+    for letter, direction in LETTER_DIRECTIONS.items():
+        letters[ord(letter)] = direction
+    characters = np.frombuffer("".join(routes).encode("ascii"), dtype=np.uint8)
+
+    return letters[characters].reshape(len(routes), -1)
+
+
+def score_routes(sequence, routes, table=ENERGY_TABLE):
+    """
+    This function scores many foldings of one protein structure at once. The routes (see route_array) are turned into 
+    coordinates with cumulative sums. A route is valid if no coordinate occurs twice. The bonds are found by comparing 
+    the coordinates of every pair of H- and C-aminoacids that are not connected in the route, and weighted with the 
+    energy table. Returns an array with the scores and an array that tells which routes are valid (invalid routes score 0).
+    """
+
+    routes = route_array(routes)
+    n_routes, n_moves = routes.shape
+    length = n_moves + 1
+
+    if len(sequence) != length:
+        raise ValueError("routes of %d moves do not fit a protein of length %d" % (n_moves, len(sequence)))
+
+    # Find the aminoacids that can make bonds and the stability of the bond between every pair of them
+    codes = np.frombuffer(Sequence.get(sequence).codes, dtype=np.uint8)
+    active = np.flatnonzero(codes != AMINO_CODES["P"])
+    energies = np.array(table).reshape(4, 4)[codes[active][:, None], codes[active][None, :]]
+
+    # Count every pair once and leave out pairs that are connected in the route
+    energies = energies * ((active[None, :] - active[:, None]) > 1)
+
+    scores = np.zeros(n_routes, dtype=energies.dtype)
+    valid = np.zeros(n_routes, dtype=bool)
+
+    # Handle the routes in batches, so the pairwise comparison fits in memory
+    batch_size = max(1, BATCH_ENTRIES // max(1, len(active) ** 2, length))
+    for start in range(0, n_routes, batch_size):
+        batch = routes[start:start + batch_size].astype(np.intp) + 2
+
+        # Turn the routes into coordinates, starting at (0, 0)
+        xs = np.zeros((len(batch), length), dtype=np.int32)
+        ys = np.zeros((len(batch), length), dtype=np.int32)
+        np.cumsum(STEP_X[batch], axis=1, out=xs[:, 1:])
+        np.cumsum(STEP_Y[batch], axis=1, out=ys[:, 1:])
+
+        # A route is valid if none of its coordinates occur twice
+        keys = np.sort(xs * (2 * length + 1) + ys, axis=1)
+        batch_valid = (keys[:, 1:] != keys[:, :-1]).all(axis=1)
+
+        # Two aminoacids make a bond if they are on neighbouring spots
+        active_x = xs[:, active]
+        active_y = ys[:, active]
+        distance = np.abs(active_x[:, :, None] - active_x[:, None, :]) + np.abs(active_y[:, :, None] - active_y[:, None, :])
+        batch_scores = np.einsum("nij,ij->n", (distance == 1).astype(energies.dtype), energies)
+
+        scores[start:start + batch_size] = np.where(batch_valid, batch_scores, 0)
+        valid[start:start + batch_size] = batch_valid
+
+    return scores, valid
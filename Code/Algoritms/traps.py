@@ -0,0 +1,88 @@
+from ..Classes.classes import KEY_STRIDE, NEIGHBOUR_STEPS
+
+# Step in the keys of protein.occupied per direction (2 = up, -2 = down, -1 = left, 1 = right)
+DIRECTION_STEPS = {2: -1, -2: 1, -1: -KEY_STRIDE, 1: KEY_STRIDE}
+
+# Steps in the keys to the eight spots around a spot, in a circle starting upwards (the even ones are neighbours)
+RING_STEPS = (-1, KEY_STRIDE - 1, KEY_STRIDE, KEY_STRIDE + 1, 1, 1 - KEY_STRIDE, -KEY_STRIDE, -KEY_STRIDE - 1)
+
+
+def reachable_area(protein, key, limit):
+    """
+    This function returns the keys of the free spots that can be reached from the free spot with the given key
+    (itself included) without passing an aminoacid of the protein. The flood fill stops as soon as limit spots
+    are found, so it never costs more than about limit steps.
+    """
+
+    occupied = protein.occupied
+    area = {key}
+    stack = [key]
+
+    while stack and len(area) < limit:
+        spot = stack.pop()
+        for step in NEIGHBOUR_STEPS:
+            neighbour = spot + step
+            if neighbour not in occupied and neighbour not in area:
+                area.add(neighbour)
+                stack.append(neighbour)
+
+    return area
+
+
+def splits_area(protein, key):
+    """
+    This function returns whether the aminoacid on the spot with the given key may split the free spots around it
+    into separate areas: the free spots among the eight spots around it form more than one group (connected along
+    the circle) that contains a neighbouring spot. If they form one group, the neighbouring free spots are still
+    connected to each other without passing the spot.
+    """
+
+    occupied = protein.occupied
+    free = [key + step not in occupied for step in RING_STEPS]
+
+    # Count the groups of free spots along the circle that contain a neighbouring spot
+    groups = 0
+    for index in range(8):
+        if free[index] and not free[index - 1]:
+            end = index
+            while free[end % 8]:
+                end += 1
+            if any(position % 2 == 0 for position in range(index, end)):
+                groups += 1
+
+    return groups > 1
+
+
+def avoid_traps(protein, directions):
+    """
+    This function returns the directions (of the free neighbouring spots of the last placed aminoacid) in which the
+    rest of the protein still fits: a move into a pocket with fewer free spots than the aminoacids that are not
+    placed yet always gets stuck later. Spots in the same pocket share one flood fill.
+    If the last placed aminoacid was chosen with this function too (or is the first one), its area was large enough,
+    so the flood fills are only needed when the last placed aminoacid splits that area (see splits_area).
+    """
+
+    remaining = len(protein.name_list) - len(protein.xs)
+    head = protein.key(protein.xs[-1], protein.ys[-1])
+
+    # The free spots around the last placed aminoacid are still part of one large enough area
+    if len(protein.xs) == 1 or not splits_area(protein, head):
+        return list(directions)
+
+    safe = []
+    areas = []
+    for direction in directions:
+        key = head + DIRECTION_STEPS[direction]
+
+        # Use the area of an earlier neighbouring spot if this spot is part of it
+        for area in areas:
+            if key in area:
+                break
+        else:
+            area = reachable_area(protein, key, remaining)
+            areas.append(area)
+
+        if len(area) >= remaining:
+            safe.append(direction)
+
+    return safe
@@ -0,0 +1,143 @@
+from ..Classes.classes import Protein, Sequence
+from .scoring import score_routes
+from .bound import upper_bound, print_gap
+from collections import Counter
+import numpy as np
+import time
+import csv
+
+# Most bytes the grids of one batch of walkers may use
+GRID_BYTES = 1 << 26
+
+# Directions of the four neighbours: up, down, left and right (see Protein.move)
+DIRECTIONS = np.array([2, -2, -1, 1], dtype=np.int8)
+STEPS_X = np.array([0, 0, -1, 1])
+STEPS_Y = np.array([-1, 1, 0, 0])
+
+
+def walk_batch(protein_string, walkers, greedy=False, rng=None):
+    """
+    This function folds the protein with many walkers at once, in lockstep: every walker is one run of the random
+    algoritm (or the greedy algoritm if greedy is True), but all walkers that are not stuck place their next aminoacid
+    in the same NumPy step. Every walker has its own grid (big enough for any route) with the code of the aminoacid on
+    every spot. A walker chooses randomly among the free neighbouring spots, the greedy walker only among the free spots
+    next to an H- or C-aminoacid if there are any (like greedy_collectdata.create_random). The random numbers are drawn
+    from rng, a NumPy Generator. Returns the routes of all walkers and whether they were completed, as arrays.
+    """
+
+    if rng is None:
+        rng = np.random.default_rng()
+
+    length = len(protein_string)
+    codes = np.frombuffer(Sequence.get(protein_string).codes, dtype=np.uint8)
+
+    # Every walker starts in the middle of its grid, the grid is large enough to never reach the border
+    size = 2 * length + 1
+    cell_steps = STEPS_X * size + STEPS_Y
+    grid = np.zeros((walkers, size * size), dtype=np.uint8)
+    cell = np.full(walkers, length * size + length, dtype=np.int64)
+    grid[:, cell[0]] = codes[0]
+
+    alive = np.ones(walkers, dtype=bool)
+    routes = np.zeros((walkers, max(length - 1, 0)), dtype=np.int8)
+
+    for i in range(1, length):
+        live = np.flatnonzero(alive)
+        if len(live) == 0:
+            break
+
+        # Find the free neighbouring spots of the last placed aminoacid of every walker
+        candidates = cell[live, None] + cell_steps
+        options = grid[live[:, None], candidates] == 0
+
+        # The greedy walker prefers free spots with an H- or C-aminoacid next to them
+        if greedy:
+            around = candidates[:, :, None] + cell_steps
+            preferred = options & (grid[live[:, None, None], around] >= 2).any(axis=2)
+            has_preferred = preferred.any(axis=1)
+            options[has_preferred] = preferred[has_preferred]
+
+        # Walkers without a free neighbouring spot are stuck
+        count = options.sum(axis=1)
+        stuck = count == 0
+        alive[live[stuck]] = False
+        live = live[~stuck]
+        options = options[~stuck]
+        candidates = candidates[~stuck]
+        count = count[~stuck]
+
+        # Choose one of the options of every walker randomly
+        pick = (rng.random(len(live)) * count).astype(np.int64)
+        choice = (options.cumsum(axis=1) <= pick[:, None]).sum(axis=1)
+
+        # Place the next aminoacid
+        cell[live] = candidates[np.arange(len(live)), choice]
+        grid[live, cell[live]] = codes[i]
+        routes[live, i - 1] = DIRECTIONS[choice]
+
+    return routes, alive
+
+
+def find_optimum(times, protein_structure, greedy=False, seed=None, resultfile=None):
+    """
+    This function runs the random algoritm (or the greedy algoritm if greedy is True) times times with lockstep
+    walkers (see walk_batch), in batches that fit in GRID_BYTES, and scores the completed routes of every batch at
+    once with score_routes. Stops after the batch in which a route reaches the upper bound (see bound.py). If a
+    resultfile is given, the route and score of every completed route is written in it. Prints the best route, score,
+    number of valid proteins and gap, and returns the best protein and a Counter with the scores of all valid proteins.
+    Returns 0 if none of the proteins is valid.
+    """
+
+    rng = np.random.default_rng(seed)
+    bound = upper_bound(protein_structure)
+    size = 2 * len(protein_structure) + 1
+    batch = max(1, GRID_BYTES // (size * size))
+
+    if greedy:
+        algorithm = "Greedy"
+    else:
+        algorithm = "Random"
+
+    scores = Counter()
+    best_score = -1
+    best_route = None
+    start_time = time.time()
+
+    for start in range(0, times, batch):
+        routes, valid = walk_batch(protein_structure, min(batch, times - start), greedy, rng)
+        routes = routes[valid]
+        if len(routes) == 0:
+            continue
+
+        # Score the completed routes of the batch at once
+        batch_scores = score_routes(protein_structure, routes)[0]
+        scores.update(batch_scores.tolist())
+
+        if batch_scores.max() > best_score:
+            best_score = batch_scores.max()
+            best_route = routes[batch_scores.argmax()]
+
+        # Write the routes and scores in the result file
+        if resultfile is not None:
+            f = open(resultfile, "a")
+            with f:
+                writer = csv.writer(f)
+                for route, score in zip(routes.tolist(), batch_scores.tolist()):
+                    writer.writerow([algorithm, route, score])
+
+        # Stop if the upper bound is reached
+        if best_score >= bound:
+            break
+
+    if best_route is None:
+        return 0
+
+    best_protein = Protein.from_route(protein_structure, best_route)
+
+    print("beste protein:", best_protein.route)
+    print("beste score:", best_protein.score)
+    print("valid proteins:", sum(scores.values()))
+    print("time:", time.time() - start_time)
+    print_gap(best_protein.score, bound)
+
+    return best_protein, scores
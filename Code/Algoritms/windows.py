@@ -0,0 +1,407 @@
+from ..Classes.classes import KEY_STRIDE, NEIGHBOUR_STEPS
+from collections import namedtuple, OrderedDict
+import numpy as np
+import os
+
+# Folder in which the window libraries are saved, it can be changed with the environment variable WINDOW_LIBRARY
+LIBRARY_DIRECTORY = os.environ.get("WINDOW_LIBRARY",
+                                   os.path.join(os.path.dirname(os.path.abspath(__file__)), "window_library"))
+
+# Directions in counterclockwise order: right, up, left, down. A left turn moves one place forward in this order
+ORDER = np.array([1, 2, -1, -2], dtype=np.int8)
+
+# Place of every direction in ORDER, indexed by direction + 2
+ORDER_INDEX = np.array([3, 2, 0, 0, 1], dtype=np.int8)
+
+# Turns of a window move: left, straight on and right
+TURNS = (1, 0, -1)
+
+# All windows of one length: the turns of every window (1 = left, 0 = straight on, -1 = right), the coordinates of its
+# aminoacids (forward and to the left, seen from the last placed aminoacid and its direction) and the skip pointers
+# (skip[n, d] is the first window after window n that differs from it in the first d + 1 turns)
+Windows = namedtuple("Windows", ["turns", "forward", "left", "skip"])
+
+# Window libraries loaded so far, with the directory and the number of moves as key
+libraries = {}
+
+# Forward and left step of every direction (see Protein.move: up lowers y)
+STEPS = {1: (1, 0), 2: (0, -1), -1: (-1, 0), -2: (0, 1)}
+LEFT_STEPS = {1: (0, -1), 2: (-1, 0), -1: (0, 1), -2: (1, 0)}
+
+
+def build_windows(length):
+    """
+    This function makes all windows of the given number of moves that do not run into themselves. A window is written
+    in turns relative to the direction of the previous move, so it can be attached to any protein, and no window turns
+    back on itself. The windows are made depth-first in the order of TURNS, so windows with the same first turns are
+    next to each other. Returns the window library (Windows).
+    """
+
+    if length < 1:
+        raise ValueError("a window needs at least one move, not %d" % length)
+
+    turns = []
+    forward = []
+    left = []
+
+    # Turns, coordinates and heading (forward and left step) of the window made so far
+    route = []
+    spots = [(0, 0)]
+    options = [list(TURNS)]
+    heading = [(1, 0)]
+
+    while options:
+
+        # If all turns have been tried, take back the last one
+        if options[-1] == []:
+            options.pop()
+            if route:
+                route.pop()
+                spots.pop()
+                heading.pop()
+            continue
+
+        turn = options[-1].pop(0)
+
+        # Turn the heading: a left turn rotates (forward, left) counterclockwise
+        step_forward, step_left = heading[-1]
+        if turn == 1:
+            step_forward, step_left = -step_left, step_forward
+        elif turn == -1:
+            step_forward, step_left = step_left, -step_forward
+
+        spot = (spots[-1][0] + step_forward, spots[-1][1] + step_left)
+        if spot in spots:
+            continue
+
+        route.append(turn)
+        spots.append(spot)
+        heading.append((step_forward, step_left))
+
+        # Save the window if it is complete, otherwise continue with the next move
+        if len(route) == length:
+            turns.append(list(route))
+            forward.append([s[0] for s in spots[1:]])
+            left.append([s[1] for s in spots[1:]])
+            route.pop()
+            spots.pop()
+            heading.pop()
+        else:
+            options.append(list(TURNS))
+
+    turns = np.array(turns, dtype=np.int8).reshape(-1, length)
+    forward = np.array(forward, dtype=np.int8).reshape(-1, length)
+    left = np.array(left, dtype=np.int8).reshape(-1, length)
+
+    # For every level, a group of windows with the same first turns ends where the next group starts
+    number = len(turns)
+    skip = np.empty((number, length), dtype=np.int32)
+    for depth in range(length):
+        starts = np.ones(number, dtype=bool)
+        starts[1:] = (turns[1:, :depth + 1] != turns[:-1, :depth + 1]).any(axis=1)
+        group_starts = np.append(np.flatnonzero(starts), number)
+        group_number = np.cumsum(starts) - 1
+        skip[:, depth] = group_starts[group_number + 1]
+
+    return Windows(turns, forward, left, skip)
+
+
+def load_windows(length, directory=None):
+    """
+    This function returns the window library of the given number of moves. The library is made only once and saved in
+    the directory (LIBRARY_DIRECTORY by default) as NumPy files, which are opened memory-mapped, so only the parts
+    that are used are read from disk. Every file is first written under a temporary name and then renamed, so other
+    processes never open a half written file. Libraries that have been loaded before are kept in libraries.
+    """
+
+    if length < 1:
+        raise ValueError("a window needs at least one move, not %d" % length)
+
+    if directory is None:
+        directory = LIBRARY_DIRECTORY
+
+    if (directory, length) in libraries:
+        return libraries[directory, length]
+
+    paths = [os.path.join(directory, "windows_{}_{}.npy".format(length, name)) for name in Windows._fields]
+
+    # Make and save the library if it has not been saved before
+    if not all(os.path.exists(path) for path in paths):
+        os.makedirs(directory, exist_ok=True)
+        for path, array in zip(paths, build_windows(length)):
+            temporary_path = "{}.{}.tmp".format(path, os.getpid())
+            with open(temporary_path, "wb") as f:
+                np.save(f, array)
+            os.replace(temporary_path, path)
+
+    library = Windows(*[np.load(path, mmap_mode="r") for path in paths])
+    libraries[directory, length] = library
+
+    return library
+
+
+def window_routes(library, direction, rows=None):
+    """
+    This function translates the turns of all windows of the library (or the windows with the given numbers) into
+    directions (see Protein.move), for a protein whose last move was in the given direction. Returns an array with a
+    route per window.
+    """
+
+    turns = library.turns
+    if rows is not None:
+        turns = turns[rows]
+
+    start = ORDER_INDEX[direction + 2]
+    return ORDER[(start + np.cumsum(turns, axis=1)) % 4]
+
+
+def window_scorer(protein, library):
+    """
+    This function prepares the scoring of the windows of the library as the next moves of the partly folded protein,
+    without placing them. Only placed aminoacids close to the last one are looked up, so the cost does not depend on 
+    the length of the protein. Returns a function score_move(t, rows) that returns, for the windows with the given 
+    numbers, the stability that aminoacid t of the window adds (its bonds with the placed aminoacids and with the 
+    earlier aminoacids of the window) and whether it is placed on a free spot, as arrays.
+    """
+
+    length = library.turns.shape[1]
+    index = len(protein.xs) - 1
+    pos_x = protein.xs[-1]
+    pos_y = protein.ys[-1]
+
+    # The first move of a protein is always to the right
+    if protein.route:
+        direction = protein.route[-1]
+    else:
+        direction = 1
+    step_x, step_y = STEPS[direction]
+    left_x, left_y = LEFT_STEPS[direction]
+
+    codes = np.frombuffer(protein.profile.codes, dtype=np.uint8).astype(np.int64)
+    table = np.array(protein.table)
+    window_codes = codes[index + 1:index + 1 + length]
+
+    # Placed aminoacids that a window can touch, sorted by key
+    placed_x = np.frombuffer(protein.xs, dtype=np.int32).astype(np.int64)
+    placed_y = np.frombuffer(protein.ys, dtype=np.int32).astype(np.int64)
+    near = np.flatnonzero(np.abs(placed_x - pos_x) + np.abs(placed_y - pos_y) <= length + 1)
+    near_keys = placed_x[near] * KEY_STRIDE + placed_y[near]
+    order = np.argsort(near_keys)
+    near_keys = near_keys[order]
+    near = near[order]
+
+    def lookup(spots):
+        # Find which spots are taken by a placed aminoacid, and by which one
+        places = np.minimum(np.searchsorted(near_keys, spots), len(near_keys) - 1)
+        return near_keys[places] == spots, near[places]
+
+    def score_move(t, rows):
+        forward = library.forward[rows, t].astype(np.int64)
+        left = library.left[rows, t].astype(np.int64)
+        keys = (pos_x + forward * step_x + left * left_x) * KEY_STRIDE + pos_y + forward * step_y + left * left_y
+
+        # The aminoacid is placed on a free spot if no placed aminoacid is there
+        taken, residues = lookup(keys)
+        free = ~taken
+
+        gains = np.zeros(len(keys), dtype=np.int64)
+        code = window_codes[t]
+        if code == 1:
+            return gains, free
+
+        # Bonds with the placed aminoacids that are not connected to this one
+        for step in NEIGHBOUR_STEPS:
+            taken, residues = lookup(keys + step)
+            taken &= residues < index + t
+            gains += np.where(taken, table[code * 4 + codes[residues]], 0)
+
+        # Bonds with the earlier aminoacids in the window that are not connected to this one
+        for u in range(t - 1):
+            energy = table[code * 4 + window_codes[u]]
+            if energy:
+                distance = np.abs(forward - library.forward[rows, u]) + np.abs(left - library.left[rows, u])
+                gains += (distance == 1) * energy
+
+        return gains, free
+
+    return score_move
+
+
+def window_gains(protein, library, rows=None):
+    """
+    This function scores all windows of the library (or the windows with the given numbers) as the next moves of the
+    partly folded protein, without placing them: only the bonds of the aminoacids in the window are counted, with the
+    placed aminoacids and with each other (see window_scorer). Returns the stability every window adds and whether it 
+    does not run into the protein, as arrays.
+    """
+
+    if rows is None:
+        rows = np.arange(len(library.turns))
+
+    score_move = window_scorer(protein, library)
+    gains = np.zeros(len(rows), dtype=np.int64)
+    valid = np.ones(len(rows), dtype=bool)
+
+    for t in range(library.turns.shape[1]):
+        move_gains, free = score_move(t, rows)
+        gains += move_gains
+        valid &= free
+
+    return gains, valid
+
+
+def best_windows_pruned(protein, library, samples=64, start=0, end=None):
+    """
+    This function finds the windows of the library with the highest stability as the next moves of the partly folded 
+    protein, like window_gains, but without scoring every window completely. The windows are grown move by move: all
+    windows with the same first moves are one group (found with the skip pointers of the library) and are scored once. 
+    A group is dropped as soon as it runs into the protein, or its stability plus the highest stability its remaining
+    aminoacids can add (two bonds each, three for the last aminoacid of the window, each as stable as possible) is lower
+    than the best of some windows scored completely first (samples). With start and end, only the windows with the
+    numbers from start up to end are searched (e.g. one part of the library per worker process). Returns the numbers
+    of the best windows, their stability and the number of groups that were scored; no numbers and None if all
+    windows run into the protein.
+    """
+
+    length = library.turns.shape[1]
+    if end is None:
+        end = len(library.turns)
+    index = len(protein.xs) - 1
+    score_move = window_scorer(protein, library)
+
+    # Score some windows completely, the best of them is the score to beat
+    sample_rows = np.unique(np.linspace(start, end - 1, min(end - start, samples)).astype(np.int64))
+    sample_gains, sample_valid = window_gains(protein, library, sample_rows)
+    if sample_valid.any():
+        lowest = sample_gains[sample_valid].max()
+    else:
+        lowest = 0
+
+    # Highest stability the aminoacids after aminoacid t of the window can add
+    codes = protein.profile.codes
+    table = protein.table
+    most_stable = [max(table[code * 4 + 2], table[code * 4 + 3]) for code in range(4)]
+    remaining = [0] * length
+    for t in range(length - 2, -1, -1):
+        bonds = 3 if t + 1 == length - 1 else 2
+        remaining[t] = remaining[t + 1] + bonds * most_stable[codes[index + 2 + t]]
+
+    # One group with all windows that are searched, it is split into the groups with the same first move first
+    groups = np.array([start], dtype=np.int64)
+    ends = np.array([end], dtype=np.int64)
+    gains = np.zeros(1, dtype=np.int64)
+    scored = 0
+
+    for t in range(length):
+
+        # Split every group into the groups with the same first t + 1 moves (at most three)
+        starts = [groups]
+        parents = [np.arange(len(groups))]
+        child = groups
+        for turn in range(2):
+            child = library.skip[child, t].astype(np.int64)
+            inside = child < ends[parents[-1]]
+            child = child[inside]
+            starts.append(child)
+            parents.append(parents[-1][inside])
+        groups = np.concatenate(starts)
+        parent = np.concatenate(parents)
+        order = np.argsort(groups)
+        groups = groups[order]
+        parent = parent[order]
+
+        # Score the next move of every group
+        move_gains, free = score_move(t, groups)
+        scored += len(groups)
+        ends = np.minimum(library.skip[groups, t], end).astype(np.int64)
+        gains = gains[parent] + move_gains
+
+        # Drop the groups that run into the protein or can not reach the score to beat
+        keep = free & (gains + remaining[t] >= lowest)
+        groups = groups[keep]
+        ends = ends[keep]
+        gains = gains[keep]
+
+        if len(groups) == 0:
+            return groups, None, scored
+
+    highest_gain = gains.max()
+    best = gains == highest_gain
+
+    return groups[best], highest_gain, scored
+
+
+def window_key(protein, length):
+    """
+    This function makes a key that describes everything the scores of the windows of the given number of moves depend
+    on: the aminoacids of the window, and the placed aminoacids close to the last one with their coordinates seen from
+    the last aminoacid and its direction. Partly folded proteins that only differ in position, rotation or the part
+    of the protein that is too far away get the same key. Returns the key as bytes.
+    """
+
+    index = len(protein.xs) - 1
+    pos_x = protein.xs[-1]
+    pos_y = protein.ys[-1]
+
+    if protein.route:
+        direction = protein.route[-1]
+    else:
+        direction = 1
+    step_x, step_y = STEPS[direction]
+    left_x, left_y = LEFT_STEPS[direction]
+
+    # Coordinates and codes of the placed aminoacids that a window can touch
+    codes = np.frombuffer(protein.profile.codes, dtype=np.uint8)
+    dx = np.frombuffer(protein.xs, dtype=np.int32) - pos_x
+    dy = np.frombuffer(protein.ys, dtype=np.int32) - pos_y
+    near = np.flatnonzero(np.abs(dx) + np.abs(dy) <= length + 1)
+    forward = dx[near] * step_x + dy[near] * step_y
+    left = dx[near] * left_x + dy[near] * left_y
+    near_residues = np.stack([forward, left, codes[near]]).astype(np.int16)
+
+    # Sort them by coordinate, so the order in which they were placed does not matter
+    near_residues = near_residues[:, np.lexsort(near_residues[:2])]
+
+    return (bytes([length]) + codes[index + 1:index + 1 + length].tobytes() + np.array(protein.table).tobytes()
+            + near_residues.tobytes())
+
+
+class WindowCache(object):
+    """
+    Cache with the best windows of the steps of the look-ahead algoritm that have been scored before, with the key of
+    the step (see window_key). The cache holds at most max_windows window numbers in total; when it is full, the
+    steps that have not been used for the longest time are removed first.
+    """
+
+    def __init__(self, max_windows=10000000):
+        self.max_windows = max_windows
+        self.windows = 0
+        self.steps = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Returns the best windows saved with the key, or None if they are not in the cache.
+        """
+        best_windows = self.steps.get(key)
+
+        if best_windows is None:
+            self.misses += 1
+            return None
+
+        # Mark the step as used most recently
+        self.steps.move_to_end(key)
+        self.hits += 1
+        return best_windows
+
+    def put(self, key, best_windows):
+        """
+        Saves the best windows with the key, and removes the steps used longest ago if the cache is too full.
+        """
+        self.steps[key] = best_windows
+        self.windows += len(best_windows)
+
+        while self.windows > self.max_windows and len(self.steps) > 1:
+            removed_key, removed_windows = self.steps.popitem(last=False)
+            self.windows -= len(removed_windows)
@@ -1,16 +1,285 @@
-import random
-from pprint import pprint
+from array import array
+
+# Distance between the keys of two horizontally neighbouring coordinates, see Protein.key
+KEY_STRIDE = 1 << 32
+
+# Differences between the key of a coordinate and the keys of its four neighbours
+NEIGHBOUR_STEPS = (KEY_STRIDE, -KEY_STRIDE, 1, -1)
+
+# Numeric codes of the aminoacids
+AMINO_CODES = {"P": 1, "H": 2, "C": 3}
+
+
+def make_energy_table(hh=1, hc=1, cc=5):
+    """
+    Makes the table with the stability that a bond between two aminoacids adds to the score. The stability of 
+    a bond between the aminoacids with codes a and b (see AMINO_CODES) is found at index a * 4 + b.
+    Bonds with a polar aminoacid never add to the score.
+    """
+
+    # Initialize a table in which no bond adds to the score
+    table = [0] * 16
+
+    # Fill in the stability of the HH-, HC/CH- and CC-bonds
+    h = AMINO_CODES["H"]
+    c = AMINO_CODES["C"]
+    table[h * 4 + h] = hh
+    table[h * 4 + c] = hc
+    table[c * 4 + h] = hc
+    table[c * 4 + c] = cc
+
+    return table
+
+
+# Stability of the bonds as used by all algorithms: HH- and HC-bonds add 1, CC-bonds add 5
+ENERGY_TABLE = make_energy_table()
+
+
+def contact_energy(occupied, codes, table, index, key, bonds=None, first=0):
+    """
+    Returns the stability of the bonds that the aminoacid with the given index makes on the spot with the given key:
+    the bonds with the aminoacids on the four neighbouring spots (occupied maps keys to indices) that are not
+    connected to it in the route and have an index of at least first. If a list bonds is given, every bond is
+    appended to it as a pair of indices, lowest first. This is the bond counting shared by Protein, calculate_score
+    and the local search in annealing.py.
+    """
+
+    # Polar aminoacids never make bonds
+    code = codes[index]
+    if code == 1:
+        return 0
+
+    stability = 0
+    row = code * 4
+    for step in NEIGHBOUR_STEPS:
+        j = occupied.get(key + step)
+        if j is not None and j >= first and (j < index - 1 or j > index + 1):
+            energy = table[row + codes[j]]
+            if energy:
+                stability += energy
+                if bonds is not None:
+                    if j < index:
+                        bonds.append((j, index))
+                    else:
+                        bonds.append((index, j))
+
+    return stability
+
+
+def encode_route(route):
+    """
+    Encodes a route (a sequence of directions) compactly as bytes, one byte per direction. 
+    This is much smaller than the protein itself, so it is cheap to send between processes.
+    """
+    return array("b", route).tobytes()
+
+
+def decode_route(data):
+    """
+    Decodes a route encoded with encode_route back into a list of directions.
+    """
+    route = array("b")
+    route.frombytes(data)
+    return route.tolist()
+
+
+class Sequence(object):
+    """
+    Profile of a protein structure (e.g. "HHPHHHPH"). It holds everything that only depends on the structure itself,
+    so it is computed once per structure and shared by all proteins (foldings) of that structure.
+    """
+
+    __slots__ = ("name", "name_list", "length", "codes", "active")
+
+    # Profiles made so far, with their protein structure as key
+    profiles = {}
 
-class Protein(object):
     def __init__(self, protein_str):
         self.name = protein_str
-        self.name_list = list(self.name)
-        self.length = len(protein_str) 
+        self.name_list = list(protein_str)
+        self.length = len(protein_str)
+
+        # Numeric code of every aminoacid, unknown characters are treated as polar
+        self.codes = bytes(AMINO_CODES.get(amino, 1) for amino in protein_str)
+
+        # Indices of the aminoacids that can make bonds (H and C)
+        self.active = tuple(index for index, amino in enumerate(protein_str) if amino in "HC")
+
+    @classmethod
+    def get(cls, protein_str):
+        """
+        Returns the shared profile of the given protein structure, the profile is only made the first time.
+        """
+        profile = cls.profiles.get(protein_str)
+
+        if profile is None:
+            profile = cls(protein_str)
+            cls.profiles[protein_str] = profile
+
+        return profile
+
+
+class Protein(object):
+    """
+    One folding of a protein structure. The coordinates of the placed aminoacids are kept in typed arrays and the
+    occupied spots in a dictionary from coordinate key to aminoacid index. The grid is unbounded, so long proteins
+    can be folded in any direction, and making a protein is cheap enough to do millions of times.
+    The score is kept up to date while the protein grows, using the given energy table.
+    """
+
+    __slots__ = ("profile", "route", "xs", "ys", "occupied", "wrong_protein", "score", "bonds", "table")
+
+    # Coordinates of the first aminoacid
+    start_x = 0
+    start_y = 0
+
+    def __init__(self, protein_str, table=ENERGY_TABLE):
+        self.profile = Sequence.get(protein_str)
         self.route = []
-        self.grid = [["0"] * 100 for _ in range(100)]
-        self.start_x = 0
-        self.start_y = 0
+        self.xs = array("i", [self.start_x])
+        self.ys = array("i", [self.start_y])
+        self.occupied = {}
         self.wrong_protein = False
         self.score = 0
         self.bonds = []
-        self.neighbours = []
\ No newline at end of file
+        self.table = table
+
+        # Place the first aminoacid at the starting position
+        if self.profile.length > 0:
+            self.occupied[self.key(self.start_x, self.start_y)] = 0
+
+    @classmethod
+    def from_route(cls, protein_str, route, table=ENERGY_TABLE):
+        """
+        Makes the protein of the given structure that follows the given route (a sequence of directions).
+        """
+        protein = cls(protein_str, table)
+
+        for direction in route:
+            protein.move(int(direction))
+
+        return protein
+
+    def copy(self):
+        """
+        Returns a copy of the protein that can be folded further without changing this protein.
+        """
+        protein = self.__class__.__new__(self.__class__)
+        protein.profile = self.profile
+        protein.route = list(self.route)
+        protein.xs = self.xs[:]
+        protein.ys = self.ys[:]
+        protein.occupied = dict(self.occupied)
+        protein.wrong_protein = self.wrong_protein
+        protein.score = self.score
+        protein.bonds = list(self.bonds)
+        protein.table = self.table
+
+        return protein
+
+    @property
+    def name(self):
+        return self.profile.name
+
+    @property
+    def name_list(self):
+        return self.profile.name_list
+
+    @property
+    def length(self):
+        return self.profile.length
+
+    @staticmethod
+    def key(pos_x, pos_y):
+        """
+        Returns the key of a coordinate in the dictionary of occupied spots. The keys of horizontal neighbours
+        differ by KEY_STRIDE, the keys of vertical neighbours by 1.
+        """
+        return pos_x * KEY_STRIDE + pos_y
+
+    def is_free(self, pos_x, pos_y):
+        """
+        Returns whether no aminoacid has been placed at the given coordinate.
+        """
+        return self.key(pos_x, pos_y) not in self.occupied
+
+    def residue_at(self, pos_x, pos_y):
+        """
+        Returns the index of the aminoacid placed at the given coordinate, or None if the spot is free.
+        """
+        return self.occupied.get(self.key(pos_x, pos_y))
+
+    def amino_at(self, pos_x, pos_y):
+        """
+        Returns the aminoacid ("H", "P" or "C") placed at the given coordinate, or "0" if the spot is free.
+        """
+        index = self.occupied.get(self.key(pos_x, pos_y))
+        if index is None:
+            return "0"
+        return self.profile.name[index]
+
+    def move(self, direction):
+        """
+        Places the succeeding aminoacid next to the last placed one, in the given direction (2 = up, -2 = down,
+        -1 = left, 1 = right), and appends the direction to the route. The bonds of the placed aminoacid with the
+        aminoacids placed before are added to the score and the bonds. Returns the stability these bonds add.
+        If the spot is already taken, the protein is marked as a wrong protein and nothing is added.
+        """
+
+        # Find the coordinate of the succeeding aminoacid
+        pos_x = self.xs[-1]
+        pos_y = self.ys[-1]
+        if abs(direction) <= 1:
+            pos_x += direction
+        else:
+            pos_y -= direction // 2
+
+        index = len(self.xs)
+        self.route.append(direction)
+        self.xs.append(pos_x)
+        self.ys.append(pos_y)
+
+        # Mark the protein as wrong if the spot is already taken
+        key = pos_x * KEY_STRIDE + pos_y
+        occupied = self.occupied
+        if key in occupied:
+            self.wrong_protein = True
+            return 0
+
+        occupied[key] = index
+
+        # Add the bonds with the placed neighbours that are not connected to this aminoacid
+        delta = contact_energy(occupied, self.profile.codes, self.table, index, key, self.bonds)
+        self.score += delta
+
+        return delta
+
+    def undo(self):
+        """
+        Takes back the last move: removes the last placed aminoacid from the route and the grid, and removes its bonds 
+        from the score and the bonds. Returns the stability that is removed. Taking back a move that ran into another 
+        aminoacid makes the protein valid again.
+        """
+
+        index = len(self.xs) - 1
+        self.route.pop()
+        key = self.xs.pop() * KEY_STRIDE + self.ys.pop()
+
+        # A move that ran into another aminoacid did not place anything
+        if self.occupied.get(key) != index:
+            self.wrong_protein = False
+            return 0
+
+        del self.occupied[key]
+
+        # Remove the bonds of the aminoacid, they are the last ones added
+        delta = 0
+        codes = self.profile.codes
+        bonds = self.bonds
+        while bonds and bonds[-1][1] == index:
+            j = bonds.pop()[0]
+            delta += self.table[codes[index] * 4 + codes[j]]
+
+        self.score -= delta
+
+        return delta
@@ -0,0 +1,51 @@
+from Code.Algoritms.perm import Perm
+import random
+
+# 20-mer used in the tests
+PROTEIN_STRING = "HPHPPHHPHPPHPHHPPHPH"
+
+
+class RecordingPerm(Perm):
+    """
+    Perm that remembers the route of every chain it grows and how often a chain was cloned.
+    """
+
+    def __init__(self, *args, **kwargs):
+        Perm.__init__(self, *args, **kwargs)
+        self.routes = []
+        self.clones = 0
+
+    def pick_directions(self, directions, factors, number):
+        if number > 1:
+            self.clones += 1
+        return Perm.pick_directions(self, directions, factors, number)
+
+    def grow(self, protein, log_weight):
+        self.routes.append(tuple(protein.route))
+        Perm.grow(self, protein, log_weight)
+
+
+def test_pick_directions_are_different():
+    perm = Perm(PROTEIN_STRING, rng=random.Random(1))
+
+    # Even when one direction is much more likely, two copies never take the same one
+    for trial in range(200):
+        chosen = perm.pick_directions([2, 1, -2], [1000.0, 1.0, 1.0], 2)
+        assert len({direction for direction, factor, chance in chosen}) == 2
+
+    # If all directions are chosen, every direction is chosen for sure
+    chosen = perm.pick_directions([2, 1, -2], [5.0, 1.0, 1.0], 3)
+    assert sorted(direction for direction, factor, chance in chosen) == [-2, 1, 2]
+    assert all(chance == 1.0 for direction, factor, chance in chosen)
+
+
+def test_clones_grow_different_chains():
+    perm = RecordingPerm(PROTEIN_STRING, upper=1.0, rng=random.Random(2))
+    for tour in range(20):
+        perm.routes = []
+        perm.tour()
+
+        # The clones of a chain diverge, so no chain is grown twice in a tour
+        assert len(perm.routes) == len(set(perm.routes))
+
+    assert perm.clones > 0
@@ -83,11 +83,11 @@ if __name__ == "__main__":
     # Asks user for the protein structure
     # protein_string = input("Please give the protein structure: ")
 
-    # # Call function to create queue of possible routes given protein structure 
-    # queue3 = breadthfirst.create_queue(protein_string)
+    # # Call function to generate the possible routes given protein structure 
+    # routes = breadthfirst.generate_routes(protein_string)
 
     # # Call function to find best protein 
-    # best_protein = breadthfirst.make_proteins(queue3, protein_string=protein_string)
+    # best_protein = breadthfirst.make_proteins(routes, protein_string=protein_string)
 
     # # Call function to plot best protein
     # breadthfirst.plot_best_protein(best_protein)
@@ -101,44 +101,8 @@ if __name__ == "__main__":
     # Set look ahead equal to four aminoacids
     lookahead = 4
 
-    # Initializes empty strings to save route
-    path = ""
-    constant_string = ""
-
-    # Iterate over the amino acids of the protein
-    for i in range(len(protein_string)-1):
-
-        # Make substring for the considered amino acids
-        substring = protein_string[i:i+lookahead]
-
-        # Create all possible routes
-        queue = lookahead_plotprotein.create_queue(substring)
-
-        # Add the previous steps to the route
-        for j in range(len(queue)):
-            queue[j] = constant_string + queue[j]
-
-        # Find protein with highest stability
-        best_protein = lookahead_plotprotein.make_proteins(queue, path, substring)
-
-        # If protein is invalid, skip to next iteration
-        if best_protein == 0:
-            break
-
-        # Define next step in route
-        else:
-            if best_protein.route[i] == 1:
-                add = "B"
-            if best_protein.route[i] == -1:
-                add = "D"
-            if best_protein.route[i] == 2:
-                add = "A"
-            if best_protein.route[i] == -2:
-                add = "C"
-
-            # Add step to definite route
-            constant_string += add
-            path += str(best_protein.name[i])
+    # Fold the protein, for every aminoacid the best route of the next four aminoacids is taken from the window library
+    best_protein = lookahead_collectdata.fold_protein(protein_string, lookahead)
     
     # plot protein
     if best_protein != 0: